@@ -3,6 +3,9 @@
 # (i guess class would be better in case more functions for configuration will be added in the future. otherwise i see no difference)
 
 import json
+import os
+import shutil
+import tempfile
 
 # url = str()
 # pagesnum = str()
@@ -32,6 +35,22 @@ def get_configuration() -> json:
     parser.add_argument('--db_ip', dest='db_ip', type=str)
     parser.add_argument('--db_port', dest='db_port', type=str)
     parser.add_argument('--db_enable', dest='db_enable', type=int)
+    parser.add_argument('--max_workers', dest='max_workers', type=int, help="number of scraper threads. 0 means the ThreadPoolExecutor default.")
+    parser.add_argument('--crawl_engine', dest='crawl_engine', type=str, choices=['threads', 'asyncio'], help="'threads' (ThreadPoolExecutor) or 'asyncio' (single event loop).")
+    parser.add_argument('--pagesnum_discovery', dest='pagesnum_discovery', type=str, choices=['linear', 'galloping'], help="how new quotes pages are discovered.")
+    parser.add_argument('--crawl_mode', dest='crawl_mode', type=str, choices=['pages', 'frontier'], help="'pages' (precomputed page urls) or 'frontier' (follow next links while crawling).")
+    parser.add_argument('--throttle_enable', dest='throttle_enable', type=int, help="1 to adapt the number of requests in flight to the server's latency and 429/5xx responses.")
+    parser.add_argument('--rate_limit_per_host', dest='rate_limit_per_host', type=float, help="max requests per second per host. 0 means unlimited.")
+    parser.add_argument('--html_parser', dest='html_parser', type=str, choices=['html.parser', 'lxml', 'lxml-xpath'], help="html parser backend.")
+    parser.add_argument('--http_cache_enable', dest='http_cache_enable', type=int, help="1 to cache fetched pages on disk and revalidate them with conditional requests.")
+    parser.add_argument('--parse_workers', dest='parse_workers', type=int, help="number of processes parsing the quote pages. 0 parses in the fetching threads, -1 means cpu_count.")
+    parser.add_argument('--archive_enable', dest='archive_enable', type=int, help="1 to append every fetched page to the compressed page archive.")
+    parser.add_argument('--offline', dest='offline', type=int, help="1 to serve all pages from the page archive instead of the network.")
+    parser.add_argument('--db_load_mode', dest='db_load_mode', type=str, choices=['stream', 'sync', 'swap', 'infile'], help="'stream' (truncate and reload the tables), 'sync' (write only the differences), 'swap' (load shadow tables and swap them in) or 'infile' (load all rows after the crawl with LOAD DATA LOCAL INFILE).")
+    parser.add_argument('--db_url', dest='db_url', type=str, help="SQLAlchemy database url, e.g. sqlite:///data/quotes.db. Overrides the db_* mysql settings.")
+    parser.add_argument('--db_pool_size', dest='db_pool_size', type=int, help="db connections kept in the pool, -1 means one per scraper thread.")
+    parser.add_argument('--json_compact', dest='json_compact', type=int, help="1 writes the json export without indentation.")
+    parser.add_argument('--json_gzip', dest='json_gzip', type=int, help="1 writes the json export gzip compressed.")
 
     
     args = parser.parse_args()
@@ -44,3 +63,30 @@ def get_configuration() -> json:
 
 
     return configuration
+
+
+def save_configuration_values(values: dict):
+    """
+    Update values in configuration.json.
+
+    The file is written to a temporary file first and then renamed over
+    configuration.json, so readers never see a half-written file.
+
+    Args:
+        values (dict): configuration keys and their new values.
+    """
+    with open('configuration.json', 'r') as file:
+        configuration = json.load(file)
+
+    configuration.update(values)
+
+    fd, tmp_path = tempfile.mkstemp(dir='.', prefix='configuration.', suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(configuration, file, indent=2)
+            file.write('\n')
+        shutil.copymode('configuration.json', tmp_path)
+        os.replace(tmp_path, 'configuration.json')
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -2,9 +2,12 @@ import os
 import inspect as ins
 
 from configuration import get_configuration
-from squotes import logger
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from squotes import get_max_workers, logger
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+
+from .pool import TimedQueuePool
 
 # Define the path to the database file
 # DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
@@ -15,6 +18,7 @@ password = configuration["db_password"]
 ip = configuration["db_ip"]
 port = configuration["db_port"]
 db_enable = configuration["db_enable"]
+db_url = configuration.get("db_url", "")
 
 exposed = [
     "Base",
@@ -24,28 +28,122 @@ exposed = [
     "TestTable",
     "Tags",
     "Quotes",
-    "QuotesTagsLink"
+    "QuotesTagsLink",
+    "create_db_engine",
+    "get_pool_metrics",
 ]
 
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # the sqlite3 module doesn't begin transactions before DDL, SQLAlchemy emits BEGIN itself (_begin_sqlite)
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers work while the writer thread commits, NORMAL only syncs at checkpoints in WAL mode
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # negative cache_size is in KiB
+    cursor.execute(f"PRAGMA cache_size=-{int(configuration.get('db_sqlite_cache_kib', 65536))}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA busy_timeout={int(configuration.get('db_sqlite_busy_timeout_ms', 5000))}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _begin_sqlite(connection):
+    connection.exec_driver_sql("BEGIN")
+
+
+def get_pool_options():
+    """
+    Get the pool arguments of create_engine for server databases.
+
+    Returns:
+        dict: TimedQueuePool with "db_pool_size" connections (-1 means one per
+              scraper thread, see get_max_workers) plus "db_max_overflow",
+              connections recycled after "db_pool_recycle" seconds and
+              checked with a ping on checkout if "db_pool_pre_ping" is 1.
+    """
+    pool_size = configuration.get("db_pool_size", -1)
+    if pool_size < 0:
+        pool_size = get_max_workers()
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": configuration.get("db_max_overflow", 10),
+        "pool_recycle": configuration.get("db_pool_recycle", 3600),
+        "pool_pre_ping": bool(configuration.get("db_pool_pre_ping", 1)),
+    }
+
+
+def get_pool_metrics():
+    """
+    Returns:
+        dict or None: The TimedQueuePool metrics of the engine, None if the db is
+                      disabled or the engine uses another pool (SQLite).
+    """
+    if db_enable == 0 or not isinstance(engine.pool, TimedQueuePool):
+        return None
+    return engine.pool.metrics()
+
+
+def create_db_engine(url):
+    """
+    Create the engine for a database URL.
+
+    Server databases get a TimedQueuePool sized by get_pool_options.
+    SQLite file databases get one connection per thread (SingletonThreadPool),
+    an in-memory database is a single connection shared by all threads
+    (StaticPool), otherwise each thread would see its own empty database.
+    MySQL connections allow LOAD DATA LOCAL INFILE in the "infile" load mode.
+    Every SQLite connection is set up with WAL journaling, synchronous=NORMAL,
+    a large page cache and foreign keys on, and transactions include DDL.
+
+    Args:
+        url (str): SQLAlchemy database URL.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        connect_args = {}
+        if url.get_backend_name() == "mysql" and configuration.get("db_load_mode", "stream") == "infile":
+            # for LOAD DATA LOCAL INFILE in load_tables, the server needs local_infile=ON too
+            connect_args["local_infile"] = True
+        return create_engine(url, connect_args=connect_args, **get_pool_options())
+
+    if url.database in (None, "", ":memory:"):
+        engine = create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(
+            url, poolclass=SingletonThreadPool, pool_size=configuration.get("db_sqlite_pool_size", 32)
+        )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(engine, "begin", _begin_sqlite)
+    return engine
+
+
 if db_enable == 0:
     logger.info(f"db is disabled in configuration. database __init__.py's db initialization parts of code ingnored.")
 else:
     exposed.append("engine")
     exposed.append("Session")        
 
-    # Create engine with the updated path
-    # engine = create_engine(f"sqlite:///{DB_PATH}", echo=True)
-    ip_and_port = ip + ":" + port
-    if port == '':
-        ip_and_port = ip
-
-    engine = create_engine(f"mysql+pymysql://{username}:{password}@{ip_and_port}/{configuration["db_name"]}?charset=utf8mb4")
+    if db_url:
+        engine = create_db_engine(db_url)
+        logger.info(f"Created database engine for {engine.url.render_as_string(hide_password=True)}")
+    else:
+        ip_and_port = ip + ":" + port
+        if port == '':
+            ip_and_port = ip
 
+        engine = create_db_engine(f"mysql+pymysql://{username}:{password}@{ip_and_port}/{configuration["db_name"]}?charset=utf8mb4")
 
-    logger.info(f"Created database engine for db {configuration["db_name"]}, user {username}, address {ip}:{port}")
+        logger.info(f"Created database engine for db {configuration["db_name"]}, user {username}, address {ip}:{port}")
 
-    # Create a configured "Session" class
-    Session = sessionmaker(bind=engine)
+    # Thread-local sessions: Session() returns the calling thread's session,
+    # which is reused by every call in that thread
+    Session = scoped_session(sessionmaker(bind=engine))
 
 # Create a base class for declarative class definitions
 Base = declarative_base()
@@ -2,19 +2,27 @@
 
 This module provides functions for initializing the database schema,
 checking table existence, inserting records into the database, and truncating tables.
+BulkWriter batches the scraper's rows into a few multi-row inserts,
+load_tables loads all rows after the crawl with LOAD DATA LOCAL INFILE.
 """
 
 from configuration import get_configuration
 from squotes import logger
-from sqlalchemy import MetaData, Table, inspect, select, update, exc
+from sqlalchemy import Column, ForeignKey, MetaData, String, Table, bindparam, delete, inspect, select, text, update, exc
 from sqlalchemy.exc import SQLAlchemyError
 
 from . import db_enable
 if db_enable == 1:
     from . import Base, Session, engine
-from .schema import  TestTable, Authors, Quotes, QuotesTagsLink, Tags
+from .schema import  TestTable, Authors, DataVersion, Quotes, QuotesTagsLink, Tags
+from .types import BinaryUUID
 
 import inspect as ins
+import os
+import tempfile
+import threading
+
+configuration = get_configuration()
 
 def initialize_schema():
     """
@@ -24,7 +32,7 @@ def initialize_schema():
         SQLAlchemyError: If there's an error during schema initialization.
     """
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
 
     try:
@@ -35,10 +43,13 @@ def initialize_schema():
         Table(Quotes.__tablename__, metadata, *[c.copy() for c in Quotes.__table__.columns],)
         Table(QuotesTagsLink.__tablename__, metadata, *[c.copy() for c in QuotesTagsLink.__table__.columns],)
         Table(TestTable.__tablename__, metadata, *[c.copy() for c in TestTable.__table__.columns],)
+        Table(DataVersion.__tablename__, metadata, *[c.copy() for c in DataVersion.__table__.columns],)
 
 
         # Create tables
         metadata.create_all(engine)
+        # tables that already existed may be missing newer keys and indexes
+        migrate_schema()
         logger.info("Database schema initialized successfully.")
 
         # Verify tables
@@ -48,9 +59,12 @@ def initialize_schema():
 
         if "quotes" in tables and "authors" in tables and "quotes_tags_link" in tables and "tags" in tables and  "TestTable" in tables:
             logger.info("All required tables have been created successfully.")
+            set_schema_verified(True)
         else:
             logger.error("Not all required tables were created.")
+            set_schema_verified(False)
     except SQLAlchemyError as e:
+        reset_schema_cache()
         logger.error(f"Error initializing database schema: {str(e)}")
         raise
 
@@ -66,7 +80,7 @@ def check_tables_exist():
         SQLAlchemyError: If there's an error during inspecting engine.
     """
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
 
     try:
@@ -80,6 +94,74 @@ def check_tables_exist():
     return all(table in existing_tables for table in required_tables)
 
 
+_schema_verified = False
+_schema_lock = threading.Lock()
+
+
+def set_schema_verified(verified):
+    """
+    Record the result of a schema check, so writes don't have to inspect the database.
+
+    Args:
+        verified (bool): True if all required tables exist.
+    """
+    global _schema_verified
+    with _schema_lock:
+        _schema_verified = bool(verified)
+
+
+def reset_schema_cache():
+    """
+    Forget the cached schema state. The next write checks the tables again.
+    Call it after changing the tables outside of initialize_schema/initDB.
+    """
+    set_schema_verified(False)
+
+
+def schema_ready():
+    """
+    Check that the required tables exist, inspecting the database only until they were found once.
+
+    The state is populated by initialize_schema and initDB and shared by all
+    threads, so writes usually don't cost an inspector round trip.
+
+    Returns:
+        bool: True if all required tables exist.
+    """
+    global _schema_verified
+    if _schema_verified:
+        return True
+    with _schema_lock:
+        if not _schema_verified:
+            _schema_verified = bool(check_tables_exist())
+        return _schema_verified
+
+
+def is_schema_error(e):
+    """
+    Returns:
+        bool: True if a db error looks like it was caused by a missing table or column.
+    """
+    if not isinstance(e, (exc.ProgrammingError, exc.OperationalError)):
+        return False
+    message = str(e).lower()
+    return any(text in message for text in ["doesn't exist", "no such table", "unknown column", "no such column"])
+
+
+def recheck_schema_after_error(e):
+    """
+    Drop the cached schema state after a schema related error and check the tables again.
+
+    Returns:
+        bool: True if the tables still exist, i.e. the error wasn't caused by missing tables.
+    """
+    if not is_schema_error(e):
+        return True
+    logger.warning(f"Schema related db error, checking the tables again: {str(e)}")
+    reset_schema_cache()
+    return schema_ready()
+
+
 def truncate_tables(session):
     """
     Truncate all tables in the database.
@@ -91,10 +173,11 @@ def truncate_tables(session):
         SQLAlchemyError: If there's an error during table truncation.
     """
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
 
-    for table in [Quotes, Authors, Tags, QuotesTagsLink, TestTable]:
+    # children first, the foreign keys are enforced (sqlite connections turn them on too)
+    for table in reversed(BULK_INSERT_ORDER):
         try:
             session.query(table).delete()
         except SQLAlchemyError as e:
@@ -118,7 +201,7 @@ def insert_records(session, records, commit=True):
         SQLAlchemyError: If there's an error during record insertion.
     """
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
 
     try:
@@ -133,9 +216,243 @@ def insert_records(session, records, commit=True):
         raise
 
 
+def get_load_mode():
+    """
+    Returns:
+        str: "db_load_mode" from configuration. "stream" truncates the tables in initDB and
+             the scraper streams every row into them, "sync" keeps the tables and
+             sync_tables only writes the differences after the crawl, "swap" streams
+             the rows into shadow tables which swap_shadow_tables swaps in after the crawl,
+             "infile" truncates the tables in initDB and load_tables loads all rows after the crawl.
+    """
+    return configuration.get("db_load_mode", "stream")
+
+
+# tables reloaded through shadow tables in the "swap" load mode, in FK order
+SWAP_MODELS = [Authors, Tags, Quotes, QuotesTagsLink]
+SHADOW_SUFFIX = "__shadow"
+OLD_SUFFIX = "__old"
+
+_shadow_metadata = MetaData()
+_shadow_tables = {}
+
+
+def _suffixed_table(model, suffix, metadata, suffixed=None):
+    # foreign keys point to the tables with the same suffix, if suffixed is given only
+    # the ones to tables named in it, the others to the unsuffixed tables
+    columns = []
+    for column in model.__table__.columns:
+        foreign_keys = [
+            ForeignKey(
+                foreign_key.column.table.name
+                + (suffix if suffixed is None or foreign_key.column.table.name in suffixed else "")
+                + "." + foreign_key.column.name
+            )
+            for foreign_key in column.foreign_keys
+        ]
+        columns.append(
+            Column(column.name, column.type, *foreign_keys, primary_key=column.primary_key, nullable=column.nullable)
+        )
+    return Table(model.__tablename__ + suffix, metadata, *columns)
+
+
+def _create_model_indexes(connection, model, table_name):
+    # the model's secondary indexes, with the model's index names, on table_name
+    quote = engine.dialect.identifier_preparer.quote
+    for index in model.__table__.indexes:
+        columns = ", ".join(quote(column.name) for column in index.columns)
+        unique = "UNIQUE " if index.unique else ""
+        connection.execute(text(f"CREATE {unique}INDEX {quote(index.name)} ON {quote(table_name)} ({columns})"))
+
+
+def shadow_tables():
+    """
+    Returns:
+        dict: Model -> shadow Table ("<table>__shadow") with the model's columns,
+              foreign keys pointing to the other shadow tables.
+    """
+    if not _shadow_tables:
+        for model in SWAP_MODELS:
+            _shadow_tables[model] = _suffixed_table(model, SHADOW_SUFFIX, _shadow_metadata)
+    return _shadow_tables
+
+
+def target_table(model):
+    """
+    Get the table the scraper's rows of a model are written to.
+
+    Returns:
+        Table: The model's shadow table in the "swap" load mode, its table otherwise.
+    """
+    if get_load_mode() == "swap" and model in SWAP_MODELS:
+        return shadow_tables()[model]
+    return model.__table__
+
+
+def create_shadow_tables():
+    """
+    Create empty shadow tables, dropping the ones left by an interrupted run.
+
+    On MySQL the shadow tables get the model's indexes right away (index names
+    are per table there). SQLite index names are global, the live tables hold
+    them until the swap, so swap_shadow_tables creates them on SQLite.
+
+    Raises:
+        SQLAlchemyError: If there's an error creating the tables.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return
+
+    tables = list(shadow_tables().values())
+    try:
+        _shadow_metadata.drop_all(engine, tables=tables)
+        _shadow_metadata.create_all(engine, tables=tables)
+        if engine.dialect.name == "mysql":
+            with engine.begin() as connection:
+                for model, table in shadow_tables().items():
+                    _create_model_indexes(connection, model, table.name)
+    except SQLAlchemyError as e:
+        logger.error(f"Error creating shadow tables: {str(e)}")
+        raise
+    logger.info(f"Created shadow tables: {[table.name for table in tables]}")
+
+
+def swap_shadow_tables():
+    """
+    Replace the tables with their loaded shadow tables in one atomic step and drop the old tables.
+
+    MySQL renames all tables in one RENAME TABLE statement. SQLite renames
+    them with ALTER TABLE, drops the old tables and creates the indexes in
+    one transaction (its DDL is transactional). Readers see either all old
+    or all new tables.
+
+    Raises:
+        SQLAlchemyError: If there's an error swapping the tables.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return
+
+    names = [model.__tablename__ for model in SWAP_MODELS]
+    renames = [(name, name + OLD_SUFFIX) for name in names] + [(name + SHADOW_SUFFIX, name) for name in names]
+    quote = engine.dialect.identifier_preparer.quote
+
+    def drop_old_tables(connection):
+        # the old tables reference each other, drop them in reverse FK order
+        for name in reversed(names):
+            connection.execute(text(f"DROP TABLE IF EXISTS {quote(name + OLD_SUFFIX)}"))
+
+    try:
+        if engine.dialect.name == "mysql":
+            with engine.begin() as connection:
+                connection.execute(text("RENAME TABLE " + ", ".join(f"{quote(old)} TO {quote(new)}" for old, new in renames)))
+            reset_schema_cache()
+            with engine.begin() as connection:
+                drop_old_tables(connection)
+        else:
+            with engine.begin() as connection:
+                for old, new in renames:
+                    connection.execute(text(f"ALTER TABLE {quote(old)} RENAME TO {quote(new)}"))
+                # the old tables keep the index names until they are dropped
+                drop_old_tables(connection)
+                for model in SWAP_MODELS:
+                    _create_model_indexes(connection, model, model.__tablename__)
+            reset_schema_cache()
+    except SQLAlchemyError as e:
+        reset_schema_cache()
+        logger.error(f"Error swapping shadow tables: {str(e)}")
+        raise
+    logger.info(f"Swapped in shadow tables: {names}")
+
+
+MIGRATE_SUFFIX = "__migrate"
+
+
+def _rebuild_tables(models, chunk_size=1000):
+    # copy the distinct rows of the models' tables (in FK order) into new tables created from
+    # the models, converting the values to the models' column types, and replace the tables with them
+    names = [model.__tablename__ for model in models]
+    metadata = MetaData()
+    # the referenced tables which aren't rebuilt, for the foreign keys of the new tables
+    for model in models:
+        for foreign_key in model.__table__.foreign_keys:
+            if foreign_key.column.table.name not in names:
+                foreign_key.column.table.to_metadata(metadata)
+    tables = [_suffixed_table(model, MIGRATE_SUFFIX, metadata, suffixed=names) for model in models]
+    quote = engine.dialect.identifier_preparer.quote
+
+    with engine.begin() as connection:
+        for table in reversed(tables):
+            table.drop(connection, checkfirst=True)
+        for name, table in zip(names, tables):
+            table.create(connection)
+            columns = ", ".join(quote(column.name) for column in table.columns)
+            not_null = " AND ".join(f"{quote(column.name)} IS NOT NULL" for column in table.primary_key.columns)
+            # the old values are read untyped and bound through the new column types
+            result = connection.execute(text(f"SELECT DISTINCT {columns} FROM {quote(name)} WHERE {not_null}"))
+            kept = 0
+            for rows in result.mappings().partitions(chunk_size):
+                connection.execute(table.insert(), [dict(row) for row in rows])
+                kept += len(rows)
+            logger.info(f"Rebuilding {name}: {kept} distinct rows kept.")
+        for name in reversed(names):
+            connection.execute(text(f"DROP TABLE {quote(name)}"))
+        for model, table in zip(models, tables):
+            connection.execute(text(f"ALTER TABLE {quote(table.name)} RENAME TO {quote(model.__tablename__)}"))
+            _create_model_indexes(connection, model, model.__tablename__)
+    logger.info(f"Rebuilt tables {names}.")
+
+
+def migrate_schema():
+    """
+    Bring tables created by an older version (or sql/quotes.sql) up to the models.
+
+    quotes_tags_link without a primary key is rebuilt with the (quote_id, tag)
+    primary key, dropping duplicate links. quotes and quotes_tags_link with
+    string quote ids are rebuilt with BinaryUUID ids. Missing secondary indexes are
+    created, unless an index on the same columns exists (MySQL creates one for
+    every foreign key). Up-to-date tables are left alone.
+
+    Raises:
+        SQLAlchemyError: If there's an error migrating the tables.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return
+
+    try:
+        inspector = inspect(engine)
+        tables = inspector.get_table_names()
+
+        rebuild = []
+        if Quotes.__tablename__ in tables and QuotesTagsLink.__tablename__ in tables:
+            if any(isinstance(column["type"], String) for column in inspector.get_columns(Quotes.__tablename__) if column["name"] == "id"):
+                rebuild = [Quotes, QuotesTagsLink]
+        if QuotesTagsLink.__tablename__ in tables and not inspector.get_pk_constraint(QuotesTagsLink.__tablename__)["constrained_columns"]:
+            rebuild = rebuild or [QuotesTagsLink]
+        if rebuild:
+            _rebuild_tables(rebuild)
+            inspector = inspect(engine)
+
+        for model in BULK_INSERT_ORDER:
+            if model.__tablename__ not in tables:
+                continue
+            indexed_columns = [index["column_names"] for index in inspector.get_indexes(model.__tablename__)]
+            for index in model.__table__.indexes:
+                if [column.name for column in index.columns] not in indexed_columns:
+                    index.create(engine)
+                    logger.info(f"Created index {index.name} on {model.__tablename__}.")
+    except SQLAlchemyError as e:
+        reset_schema_cache()
+        logger.error(f"Error migrating database schema: {str(e)}")
+        raise
+
+
 def initDB():
     """
     Initialize the database by creating schema, truncating existing tables, and inserting initial records.
+    The tables aren't truncated in the "sync" load mode, in the "swap" load mode empty shadow tables are created.
 
     Args:
         records (list): List of record objects to be inserted after schema creation.
@@ -144,18 +461,28 @@ def initDB():
         Exception: If an unexpected error occurs during database initialization.
     """
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
 
     try:
         # Initialize the schema first
         initialize_schema()
 
-        # Check if tables exist
-        if not check_tables_exist():
+        # initialize_schema recorded whether the tables exist, no need to inspect them again
+        if not schema_ready():
             logger.error("Tables were not created successfully.")
             return
 
+        if get_load_mode() == "sync":
+            # rows are reconciled by sync_tables after the crawl, the tables stay readable
+            logger.info("db_load_mode is 'sync', tables are not truncated.")
+            return
+
+        if get_load_mode() == "swap":
+            # rows are loaded into shadow tables, swapped in by swap_shadow_tables after the crawl
+            create_shadow_tables()
+            return
+
         session = Session()
         try:
             # Truncate existing tables
@@ -191,10 +518,10 @@ def insertRow(row):
         SQLAlchemyError: If there's an error during row insertion.
     """
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
 
-    if not check_tables_exist():
+    if not schema_ready():
         logger.error("Tables do not exist. Cannot insert row.")
         return
 
@@ -211,6 +538,9 @@ def insertRow(row):
         #print("integrity error")
     except SQLAlchemyError as e:
         session.rollback()
+        if not recheck_schema_after_error(e):
+            logger.error("Tables do not exist. Cannot insert row.")
+            return
         logger.error(f"Error inserting row into {row.__tablename__}: {str(e)}")
         raise 
 
@@ -219,10 +549,10 @@ def insertRow(row):
 
 def updateAuthorRowAboutValue(author: str, about_text: str):
     if db_enable == 0:
-        logger.info(f"db is disabled in configuration. {ins.stack()[0][3]} ignored.")
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
         return
     
-    if not check_tables_exist():
+    if not schema_ready():
         logger.error("Tables do not exist. Cannot insert row.")
         return
 
@@ -240,7 +570,576 @@ def updateAuthorRowAboutValue(author: str, about_text: str):
     #     #print("NoResultFound error for this author: ", author)
     except SQLAlchemyError as e:
         session.rollback()
+        if not recheck_schema_after_error(e):
+            logger.error("Tables do not exist. Cannot insert row.")
+            return
         logger.error(f"Error updating {author} row: {str(e)}")
         raise
     finally:
         session.close()
+
+
+# FK order: rows of a table are inserted after the rows they reference
+BULK_INSERT_ORDER = [Authors, Tags, Quotes, QuotesTagsLink, TestTable]
+
+
+def bulk_insert_statement(table, update_columns=()):
+    """
+    Build an insert statement which skips (or updates) rows whose primary key already exists.
+
+    MySQL gets INSERT ... ON DUPLICATE KEY UPDATE (with a no-op pk = pk update
+    for skipped rows, INSERT IGNORE would also turn foreign key, NOT NULL and
+    truncation errors into warnings), SQLite gets INSERT ... ON CONFLICT DO
+    NOTHING/UPDATE.
+
+    Args:
+        table (Table): The table to insert into.
+        update_columns (iterable): Columns overwritten if the row exists. Empty means the row is skipped.
+
+    Returns:
+        Insert: The statement, to be executed with a list of rows.
+    """
+    update_columns = list(update_columns)
+    dialect = engine.dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        if update_columns:
+            return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in update_columns})
+        key = table.primary_key.columns[0]
+        return stmt.on_duplicate_key_update({key.name: key})
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(table)
+        if update_columns:
+            return stmt.on_conflict_do_update(
+                index_elements=[column.name for column in table.primary_key.columns],
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+        return stmt.on_conflict_do_nothing()
+
+    raise Exception(f"Bulk inserts aren't supported for the {dialect} dialect.")
+
+
+class BulkWriter:
+    """
+    Accumulates rows per table and inserts them with one executemany per chunk.
+
+    Rows already in the table are skipped like insertRow skips them on
+    integrity errors. A flush writes every pending row in one transaction in
+    BULK_INSERT_ORDER, followed by the upserts, so a row is never inserted
+    before the rows its foreign keys point to. Flushes are serialized, so
+    rows added later are never committed before rows added earlier.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, chunk_size=1000, flush_rows=10000):
+        """
+        Args:
+            chunk_size (int): Rows per executemany.
+            flush_rows (int): Pending rows which trigger a flush from add/upsert. 0 means only explicit flushes.
+        """
+        self.chunk_size = chunk_size
+        self.flush_rows = flush_rows
+        self._inserts = {}
+        self._upserts = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        # metrics
+        self.rows_written = 0
+        self.statements = 0
+        self.flushes = 0
+
+    @staticmethod
+    def _values(row):
+        return {column.name: getattr(row, column.key) for column in row.__table__.columns}
+
+    def add(self, row):
+        """
+        Queue an ORM row (Authors, Tags, Quotes, QuotesTagsLink or TestTable) for insertion.
+        """
+        if db_enable == 0:
+            return
+        with self._lock:
+            self._inserts.setdefault(type(row), []).append(self._values(row))
+            self._pending += 1
+            flush = self.flush_rows and self._pending >= self.flush_rows
+        if flush:
+            self.flush()
+
+    def add_all(self, rows):
+        """
+        Queue several ORM rows for insertion.
+        """
+        for row in rows:
+            self.add(row)
+
+    def upsert(self, row, update_columns):
+        """
+        Queue an ORM row which overwrites `update_columns` of an existing row with the same primary key.
+        """
+        if db_enable == 0:
+            return
+        key = (type(row), tuple(update_columns))
+        with self._lock:
+            self._upserts.setdefault(key, []).append(self._values(row))
+            self._pending += 1
+            flush = self.flush_rows and self._pending >= self.flush_rows
+        if flush:
+            self.flush()
+
+    def update_pending(self, model, key_column, values):
+        """
+        Change rows which are still queued for insertion, so they are inserted with their final values.
+
+        Args:
+            model: ORM class of the rows.
+            key_column (str): Column identifying a row.
+            values (dict): key -> {column: new value}.
+
+        Returns:
+            set: Keys of which at least one queued row was changed.
+        """
+        updated = set()
+        with self._lock:
+            for row in self._inserts.get(model, []):
+                if row[key_column] in values:
+                    row.update(values[row[key_column]])
+                    updated.add(row[key_column])
+        return updated
+
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def _execute_chunks(self, connection, stmt, rows):
+        for i in range(0, len(rows), self.chunk_size):
+            connection.execute(stmt, rows[i:i + self.chunk_size])
+            self.statements += 1
+
+    def flush(self):
+        """
+        Insert all pending rows.
+
+        Returns:
+            int: Number of rows sent to the db.
+
+        Raises:
+            SQLAlchemyError: If there's an error during insertion. The rows of the failed flush
+                             are put back in front of the pending rows, the next flush retries them.
+        """
+        if db_enable == 0:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                inserts, self._inserts = self._inserts, {}
+                upserts, self._upserts = self._upserts, {}
+                pending, self._pending = self._pending, 0
+            if not pending:
+                return 0
+
+            try:
+                with engine.begin() as connection:
+                    # the rows are inserted in FK order and nobody reads the shadow tables,
+                    # so the per-row FK lookups are skipped while loading them
+                    skip_fk_checks = get_load_mode() == "swap" and engine.dialect.name == "mysql"
+                    if skip_fk_checks:
+                        connection.execute(text("SET FOREIGN_KEY_CHECKS=0"))
+                    try:
+                        for model in BULK_INSERT_ORDER:
+                            if model in inserts:
+                                self._execute_chunks(connection, bulk_insert_statement(target_table(model)), inserts[model])
+                        for (model, update_columns), rows in upserts.items():
+                            self._execute_chunks(connection, bulk_insert_statement(target_table(model), update_columns), rows)
+                    finally:
+                        if skip_fk_checks:
+                            connection.execute(text("SET FOREIGN_KEY_CHECKS=1"))
+            except SQLAlchemyError as e:
+                with self._lock:
+                    for model, rows in inserts.items():
+                        self._inserts[model] = rows + self._inserts.get(model, [])
+                    for key, rows in upserts.items():
+                        self._upserts[key] = rows + self._upserts.get(key, [])
+                    self._pending += pending
+                recheck_schema_after_error(e)
+                logger.error(f"Error flushing {pending} rows, they are kept for the next flush: {str(e)}")
+                raise
+
+            self.rows_written += pending
+            self.flushes += 1
+            logger.info(f"Flushed {pending} rows in bulk ({self.statements} statements in {self.flushes} flushes so far).")
+            return pending
+
+
+_bulk_writer = None
+_bulk_writer_lock = threading.Lock()
+
+
+def get_bulk_writer():
+    """
+    Get the shared bulk writer, creating it on first use.
+
+    Returns:
+        BulkWriter: The writer, sized by "db_bulk_chunk_size" and "db_bulk_flush_rows" from configuration.
+    """
+    global _bulk_writer
+    if _bulk_writer is None:
+        with _bulk_writer_lock:
+            if _bulk_writer is None:
+                _bulk_writer = BulkWriter(
+                    chunk_size=configuration.get("db_bulk_chunk_size", 1000),
+                    flush_rows=configuration.get("db_bulk_flush_rows", 10000),
+                )
+    return _bulk_writer
+
+
+def bulk_update_authors_about(about_texts, chunk_size=1000):
+    """
+    Set the about text of many authors with a few set-based statements.
+
+    The current about texts are selected in chunks, only the rows which
+    differ are updated with one executemany UPDATE and authors without a row
+    are inserted with their about text.
+
+    Args:
+        about_texts (dict): author -> about text.
+        chunk_size (int): Authors per SELECT and per executemany.
+
+    Returns:
+        dict: Number of "changed", "unchanged" (already current) and "inserted" rows.
+
+    Raises:
+        SQLAlchemyError: If there's an error during the update.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return
+
+    authors_table = target_table(Authors)
+    authors = list(about_texts)
+    current = {}
+    try:
+        with engine.begin() as connection:
+            for i in range(0, len(authors), chunk_size):
+                rows = connection.execute(
+                    select(authors_table.c.author, authors_table.c.about).where(
+                        authors_table.c.author.in_(authors[i:i + chunk_size])
+                    )
+                )
+                current.update({author: about for author, about in rows})
+
+            changed = [
+                {"b_author": author, "b_about": about_texts[author]}
+                for author in authors
+                if author in current and current[author] != about_texts[author]
+            ]
+            missing = [{"author": author, "about": about_texts[author]} for author in authors if author not in current]
+
+            stmt = (
+                update(authors_table)
+                .where(authors_table.c.author == bindparam("b_author"))
+                .values(about=bindparam("b_about"))
+            )
+            for i in range(0, len(changed), chunk_size):
+                connection.execute(stmt, changed[i:i + chunk_size])
+            for i in range(0, len(missing), chunk_size):
+                connection.execute(bulk_insert_statement(authors_table), missing[i:i + chunk_size])
+    except SQLAlchemyError as e:
+        recheck_schema_after_error(e)
+        logger.error(f"Error updating the about texts of {len(authors)} authors: {str(e)}")
+        raise
+
+    result = {"changed": len(changed), "unchanged": len(current) - len(changed), "inserted": len(missing)}
+    logger.info(f"Updated authors' about texts: {result}")
+    return result
+
+
+def _chunks(rows, chunk_size):
+    for i in range(0, len(rows), chunk_size):
+        yield rows[i:i + chunk_size]
+
+
+SYNC_SUFFIX = "__sync"
+
+
+def _staging_table(model, metadata):
+    # temporary copy of the model's table without foreign keys, only visible to the connection
+    columns = [Column(column.name, column.type, primary_key=column.primary_key) for column in model.__table__.columns]
+    return Table(model.__tablename__ + SYNC_SUFFIX, metadata, *columns, prefixes=["TEMPORARY"])
+
+
+def _drop_staging_table(connection, staging):
+    # DROP TABLE commits the transaction on MySQL, DROP TEMPORARY TABLE doesn't
+    temporary = "TEMPORARY " if engine.dialect.name == "mysql" else ""
+    connection.execute(text(f"DROP {temporary}TABLE IF EXISTS {engine.dialect.identifier_preparer.quote(staging.name)}"))
+
+
+def _missing(table, rows, key):
+    # the rows (of another table) whose key isn't in table
+    return ~select(1).where(*[table.c[column] == rows.c[column] for column in key]).exists()
+
+
+def sync_tables(quotes, quote_tag_link, tags, authors, chunk_size=1000):
+    """
+    Make the tables match the scraped data, writing only the differences.
+
+    The scraped rows are loaded into temporary staging tables and compared to
+    the stored rows by the db, so the stored rows aren't read. New rows are
+    inserted, rows with different values are updated and rows which weren't
+    scraped are deleted, all in one transaction, so readers see either the old
+    or the new data. Quotes are matched by their text and author: a scraped
+    quote which is already stored keeps the stored id. The scraped dicts
+    aren't changed, apply the returned id mapping to them after the sync.
+
+    Args:
+        quotes (list): {"quote_uuid", "quote_text", "author"} dicts.
+        quote_tag_link (list): {"quote_uuid", "tag"} dicts.
+        tags (list): Tag names.
+        authors (list): {"author", "about"} dicts.
+        chunk_size (int): Rows per statement.
+
+    Returns:
+        tuple: dict of table name -> {"inserted", "updated", "deleted", "unchanged"} counts,
+               dict of scraped quote id -> stored quote id for the quotes stored under another id.
+
+    Raises:
+        SQLAlchemyError: If there's an error during the sync.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return None, {}
+
+    metadata = MetaData()
+    tables = {model.__tablename__: (model.__table__, _staging_table(model, metadata)) for model in [Authors, Tags, Quotes, QuotesTagsLink]}
+    keys = {
+        Authors.__tablename__: ["author"],
+        Tags.__tablename__: ["tag"],
+        Quotes.__tablename__: ["id"],
+        QuotesTagsLink.__tablename__: ["quote_id", "tag"],
+    }
+    authors_table, authors_staging = tables[Authors.__tablename__]
+    quotes_table, quotes_staging = tables[Quotes.__tablename__]
+    counts = {name: {"inserted": 0, "updated": 0, "deleted": 0} for name in tables}
+
+    try:
+        with engine.begin() as connection:
+            for _, staging in tables.values():
+                # left over on the connection if a sync failed on a db without transactional DDL
+                _drop_staging_table(connection, staging)
+                staging.create(connection)
+
+            staged = {
+                Authors.__tablename__: [{"author": author, "about": about} for author, about in {author["author"]: author["about"] for author in authors}.items()],
+                Tags.__tablename__: [{"tag": tag} for tag in dict.fromkeys(tags)],
+                Quotes.__tablename__: list({quote["quote_uuid"]: {"id": quote["quote_uuid"], "text": quote["quote_text"], "author": quote["author"]} for quote in quotes}.values()),
+            }
+            for name, rows in staged.items():
+                for chunk in _chunks(rows, chunk_size):
+                    connection.execute(tables[name][1].insert(), chunk)
+
+            # reuse the ids of stored quotes
+            quote_ids = dict(
+                connection.execute(
+                    select(quotes_staging.c.id, quotes_table.c.id)
+                    .join(quotes_table, (quotes_table.c.text == quotes_staging.c.text) & (quotes_table.c.author == quotes_staging.c.author))
+                    .where(quotes_table.c.id != quotes_staging.c.id)
+                ).all()
+            )
+            stmt = update(quotes_staging).where(quotes_staging.c.id == bindparam("b_id")).values(id=bindparam("b_stored_id"))
+            for chunk in _chunks([{"b_id": id, "b_stored_id": stored_id} for id, stored_id in quote_ids.items()], chunk_size):
+                connection.execute(stmt, chunk)
+            links = dict.fromkeys((quote_ids.get(link["quote_uuid"], link["quote_uuid"]), link["tag"]) for link in quote_tag_link)
+            staged[QuotesTagsLink.__tablename__] = [{"quote_id": quote_id, "tag": tag} for quote_id, tag in links]
+            for chunk in _chunks(staged[QuotesTagsLink.__tablename__], chunk_size):
+                connection.execute(tables[QuotesTagsLink.__tablename__][1].insert(), chunk)
+
+            # inserts and updates in FK order
+            for name, (table, staging) in tables.items():
+                columns = [column.name for column in table.columns]
+                result = connection.execute(
+                    table.insert().from_select(columns, select(*[staging.c[column] for column in columns]).where(_missing(table, staging, keys[name])))
+                )
+                counts[name]["inserted"] = result.rowcount
+                if name == Authors.__tablename__:
+                    result = connection.execute(
+                        update(authors_table)
+                        .values(about=authors_staging.c.about)
+                        .where(authors_table.c.author == authors_staging.c.author, authors_table.c.about.is_distinct_from(authors_staging.c.about))
+                    )
+                    counts[name]["updated"] = result.rowcount
+                elif name == Quotes.__tablename__:
+                    result = connection.execute(
+                        update(quotes_table)
+                        .values(text=quotes_staging.c.text, author=quotes_staging.c.author)
+                        .where(
+                            quotes_table.c.id == quotes_staging.c.id,
+                            (quotes_table.c.text != quotes_staging.c.text) | quotes_table.c.author.is_distinct_from(quotes_staging.c.author),
+                        )
+                    )
+                    counts[name]["updated"] = result.rowcount
+
+            # deletes in reverse FK order
+            for name, (table, staging) in reversed(list(tables.items())):
+                result = connection.execute(delete(table).where(_missing(staging, table, keys[name])))
+                counts[name]["deleted"] = result.rowcount
+
+            for _, staging in tables.values():
+                _drop_staging_table(connection, staging)
+    except SQLAlchemyError as e:
+        recheck_schema_after_error(e)
+        logger.error(f"Error syncing the tables: {str(e)}")
+        raise
+
+    for name, table_counts in counts.items():
+        table_counts["unchanged"] = len(staged[name]) - table_counts["inserted"] - table_counts["updated"]
+    logger.info(f"Synced tables: {counts}")
+    return counts, quote_ids
+
+
+def bump_data_version():
+    """
+    Increment the data version after a load, so the query caches of other
+    processes (database.queries) drop their results.
+
+    Returns:
+        int: The new version.
+
+    Raises:
+        SQLAlchemyError: If there's an error updating the version.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return
+
+    table = DataVersion.__table__
+    try:
+        with engine.begin() as connection:
+            if connection.execute(update(table).where(table.c.id == 1).values(version=table.c.version + 1)).rowcount == 0:
+                connection.execute(table.insert(), {"id": 1, "version": 1})
+            version = connection.execute(select(table.c.version).where(table.c.id == 1)).scalar()
+    except SQLAlchemyError as e:
+        recheck_schema_after_error(e)
+        logger.error(f"Error bumping the data version: {str(e)}")
+        raise
+    logger.info(f"Data version bumped to {version}.")
+    return version
+
+
+# MySQL LOAD DATA escapes of the default FIELDS ESCAPED BY '\\' format
+_INFILE_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def write_infile(rows, file):
+    """
+    Write rows in the default LOAD DATA format: tab separated fields, one row per
+    line, backslash escapes, \\N for NULL.
+
+    Args:
+        rows (list): Tuples of column values, in the table's column order.
+        file (file object): Text file to write to.
+    """
+    for row in rows:
+        file.write("\t".join("\\N" if value is None else str(value).translate(_INFILE_ESCAPES) for value in row) + "\n")
+
+
+def load_data_statement(table, path):
+    """
+    Build the LOAD DATA LOCAL INFILE statement loading a file written by write_infile into a table.
+    BinaryUUID columns are read as text and converted with UNHEX. Duplicate keys are skipped.
+
+    Returns:
+        str: The statement.
+    """
+    quote = engine.dialect.identifier_preparer.quote
+    columns = []
+    conversions = []
+    for column in table.columns:
+        if isinstance(column.type, BinaryUUID):
+            columns.append(f"@{column.name}")
+            conversions.append(f"{quote(column.name)} = UNHEX(REPLACE(@{column.name}, '-', ''))")
+        else:
+            columns.append(quote(column.name))
+    path = path.replace("\\", "\\\\").replace("'", "\\'")
+    stmt = (
+        f"LOAD DATA LOCAL INFILE '{path}' IGNORE INTO TABLE {quote(table.name)} CHARACTER SET utf8mb4 "
+        f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+    )
+    if conversions:
+        stmt += " SET " + ", ".join(conversions)
+    return stmt
+
+
+def _load_infile(connection, table, rows, directory):
+    fd, path = tempfile.mkstemp(prefix=table.name + ".", suffix=".tsv", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+        write_infile(rows, file)
+    # pymysql formats the query with %, a literal % in the path is doubled
+    connection.exec_driver_sql(load_data_statement(table, path).replace("%", "%%"))
+
+
+def load_tables(quotes, quote_tag_link, tags, authors, chunk_size=1000):
+    """
+    Load the scraped data into the tables without the ORM.
+
+    On MySQL every table is written to a temporary file and loaded with
+    LOAD DATA LOCAL INFILE. On other backends, or if the server refuses
+    local infiles, the rows are inserted with chunked executemany instead.
+    All tables are loaded in one transaction, duplicate keys are skipped.
+
+    Args:
+        quotes (list): {"quote_uuid", "quote_text", "author"} dicts.
+        quote_tag_link (list): {"quote_uuid", "tag"} dicts.
+        tags (list): Tag names.
+        authors (list): {"author", "about"} dicts.
+        chunk_size (int): Rows per executemany statement.
+
+    Returns:
+        dict: table name -> number of rows sent to the db.
+
+    Raises:
+        SQLAlchemyError: If there's an error loading the tables.
+    """
+    if db_enable == 0:
+        logger.info(f"db is disabled in configuration. {ins.currentframe().f_code.co_name} ignored.")
+        return
+
+    # in FK order, values in column order
+    table_rows = [
+        (Authors.__table__, [(author["author"], author["about"]) for author in authors]),
+        (Tags.__table__, [(tag,) for tag in tags]),
+        (Quotes.__table__, [(quote["quote_uuid"], quote["quote_text"], quote["author"]) for quote in quotes]),
+        (QuotesTagsLink.__table__, [(link["quote_uuid"], link["tag"]) for link in quote_tag_link]),
+    ]
+    use_infile = engine.dialect.name == "mysql"
+    counts = {}
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="load_tables.") as directory, engine.begin() as connection:
+            for table, rows in table_rows:
+                if use_infile:
+                    try:
+                        with connection.begin_nested():
+                            _load_infile(connection, table, rows, directory)
+                    except exc.OperationalError as e:
+                        # local_infile is off on the server (or the client)
+                        logger.warning(f"LOAD DATA LOCAL INFILE failed, falling back to executemany: {str(e)}")
+                        use_infile = False
+                if not use_infile:
+                    column_names = [column.name for column in table.columns]
+                    for chunk in _chunks(rows, chunk_size):
+                        connection.execute(bulk_insert_statement(table), [dict(zip(column_names, row)) for row in chunk])
+                counts[table.name] = len(rows)
+    except SQLAlchemyError as e:
+        recheck_schema_after_error(e)
+        logger.error(f"Error loading the tables: {str(e)}")
+        raise
+
+    logger.info(f"Loaded tables {'with LOAD DATA LOCAL INFILE' if use_infile else 'with executemany'}: {counts}")
+    return counts
@@ -0,0 +1,63 @@
+"""Connection pool with wait-time metrics.
+
+TimedQueuePool is a QueuePool which records how long checkouts wait for a
+free connection (or for a new one to be opened). A high wait time means the
+threads are queueing on the pool, i.e. the db (or the pool size) is the
+bottleneck.
+"""
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool recording the checkout wait times. The metrics are shared by
+    the pools recreated from it (engine.dispose(), pool.recreate()).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._metrics = kwargs.pop("_metrics", None) or {
+            "lock": threading.Lock(),
+            "checkouts": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+        }
+        super().__init__(*args, **kwargs)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics["lock"]:
+                self._metrics["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics["lock"]:
+                self._metrics["checkouts"] += 1
+                self._metrics["wait_seconds"] += waited
+                self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], waited)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Number of checkouts, their total and max wait for a connection in seconds,
+                  checkouts which timed out, and the pool's current state.
+        """
+        with self._metrics["lock"]:
+            metrics = {key: value for key, value in self._metrics.items() if key != "lock"}
+        metrics["size"] = self.size()
+        metrics["checked_out"] = self.checkedout()
+        metrics["overflow"] = self.overflow()
+        return metrics
@@ -0,0 +1,260 @@
+"""Read API over the scraped dataset.
+
+The functions load the relationships they return eagerly (selectinload), so
+a page of quotes costs a fixed number of queries instead of one lazy load
+per quote. Lists are paginated with keysets: pass the "next" value of a
+page as `after` to get the following page.
+
+Results are plain dicts and lists, cached in an in-process LRU cache. The
+cache is cleared whenever a transaction on the engine commits, so a run
+writing new data in the same process invalidates it. Other processes (the
+scraper) bump the data_version row after each load, every query compares
+it to the version the cached results were loaded at. Don't modify the
+returned objects, they are shared by all callers of the same query.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+
+from configuration import get_configuration
+from squotes import logger
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session as OrmSession, selectinload
+
+from . import db_enable
+if db_enable == 1:
+    from . import engine
+from .schema import Authors, DataVersion, Quotes, QuotesTagsLink
+
+configuration = get_configuration()
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of query results.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Args:
+            maxsize (int): Max number of cached results. 0 disables the cache.
+        """
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by clear(), results of queries started before a clear aren't stored
+        self._generation = 0
+        # data version the cached results were loaded at
+        self._data_version = None
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, load):
+        """
+        Get the cached result of a key, calling load() on a miss.
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+            generation = self._generation
+
+        result = load()
+
+        with self._lock:
+            if self.maxsize and generation == self._generation:
+                self._results[key] = result
+                self._results.move_to_end(key)
+                while len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+        return result
+
+    def check_data_version(self, version):
+        """
+        Clear the cache if the data version changed since the last check.
+        """
+        with self._lock:
+            changed = self._data_version is not None and version != self._data_version
+            self._data_version = version
+        if changed:
+            self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Cache hits, misses, invalidations and the number of cached results.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations, "size": len(self._results)}
+
+
+_query_cache = QueryCache(configuration.get("db_query_cache_size", 1024))
+
+
+def get_query_cache():
+    """
+    Returns:
+        QueryCache: The shared result cache, sized by "db_query_cache_size".
+    """
+    return _query_cache
+
+
+def _clear_on_commit(connection):
+    _query_cache.clear()
+
+
+def invalidate_cache_on_commit(engine):
+    """
+    Clear the result cache whenever a transaction on the engine commits.
+    Done for the configured engine on import.
+    """
+    if not event.contains(engine, "commit", _clear_on_commit):
+        event.listen(engine, "commit", _clear_on_commit)
+
+
+if db_enable == 1:
+    invalidate_cache_on_commit(engine)
+
+
+def data_version():
+    """
+    Returns:
+        int: The version bumped by the scraper after each load, 0 before the first one.
+    """
+    with engine.connect() as connection:
+        return connection.execute(select(DataVersion.version).where(DataVersion.id == 1)).scalar() or 0
+
+
+def cached_query(function):
+    """
+    Cache the results of a query function by its name and arguments.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if db_enable == 0:
+            logger.info(f"db is disabled in configuration. {function.__name__} ignored.")
+            return None
+        if _query_cache.maxsize:
+            # a primary key lookup, the loads of other processes don't fire the commit event here
+            _query_cache.check_data_version(data_version())
+        key = (function.__name__, args, tuple(sorted(kwargs.items())))
+        return _query_cache.get(key, lambda: function(*args, **kwargs))
+    return wrapper
+
+
+def _quote_dict(quote):
+    return {
+        "id": quote.id,
+        "text": quote.text,
+        "author": quote.author,
+        "tags": sorted(link.tag for link in quote.quotes_tags_link),
+    }
+
+
+def _quotes_page(where, limit, after):
+    stmt = (
+        select(Quotes)
+        .where(*where)
+        .options(selectinload(Quotes.quotes_tags_link))
+        .order_by(Quotes.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(Quotes.id > after)
+    with OrmSession(engine) as session:
+        quotes = [_quote_dict(quote) for quote in session.scalars(stmt)]
+    return {"items": quotes, "next": quotes[-1]["id"] if len(quotes) == limit else None}
+
+
+@cached_query
+def quotes_by_tag(tag, limit=50, after=None):
+    """
+    Get a page of the quotes with a tag, ordered by id.
+
+    Args:
+        tag (str): The tag.
+        limit (int): Max quotes on the page.
+        after (str, optional): The "next" value of the previous page.
+
+    Returns:
+        dict: "items" (list of {"id", "text", "author", "tags"} dicts) and "next"
+              (None on the last page).
+    """
+    tagged = select(QuotesTagsLink.quote_id).where(QuotesTagsLink.tag == tag)
+    return _quotes_page([Quotes.id.in_(tagged)], limit, after)
+
+
+@cached_query
+def quotes_by_author(author, limit=50, after=None):
+    """
+    Get a page of an author's quotes, ordered by id. Same result as quotes_by_tag.
+    """
+    return _quotes_page([Quotes.author == author], limit, after)
+
+
+@cached_query
+def tag_counts(limit=None):
+    """
+    Get the number of quotes of each tag.
+
+    Args:
+        limit (int, optional): Only the `limit` most used tags.
+
+    Returns:
+        list: (tag, count) tuples, most used first.
+    """
+    count = func.count(QuotesTagsLink.quote_id)
+    stmt = select(QuotesTagsLink.tag, count).group_by(QuotesTagsLink.tag).order_by(count.desc(), QuotesTagsLink.tag)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    with engine.connect() as connection:
+        return [(tag, count) for tag, count in connection.execute(stmt)]
+
+
+@cached_query
+def list_authors(limit=50, after=None, with_quotes=False):
+    """
+    Get a page of the authors, ordered by name.
+
+    Args:
+        limit (int): Max authors on the page.
+        after (str, optional): The "next" value of the previous page.
+        with_quotes (bool): Include the authors' quotes (loaded with two more queries per page).
+
+    Returns:
+        dict: "items" (list of {"author", "about", "quotes_count"} dicts, with "quotes"
+              if with_quotes is set) and "next" (None on the last page).
+    """
+    stmt = select(Authors).order_by(Authors.author).limit(limit)
+    if after is not None:
+        stmt = stmt.where(Authors.author > after)
+    if with_quotes:
+        stmt = stmt.options(selectinload(Authors.quotes).selectinload(Quotes.quotes_tags_link))
+
+    with OrmSession(engine) as session:
+        authors = session.scalars(stmt).all()
+        names = [author.author for author in authors]
+        quotes_counts = dict(
+            session.execute(
+                select(Quotes.author, func.count(Quotes.id)).where(Quotes.author.in_(names)).group_by(Quotes.author)
+            ).all()
+        )
+        items = []
+        for author in authors:
+            item = {"author": author.author, "about": author.about, "quotes_count": quotes_counts.get(author.author, 0)}
+            if with_quotes:
+                item["quotes"] = [_quote_dict(quote) for quote in sorted(author.quotes, key=lambda quote: quote.id)]
+            items.append(item)
+    return {"items": items, "next": names[-1] if len(names) == limit else None}
@@ -6,6 +6,8 @@ This module defines the SQLAlchemy ORM models for the database tables.
 from sqlalchemy import DECIMAL, CheckConstraint, Column, Integer, String, TEXT, ForeignKey
 from sqlalchemy.orm import declarative_base, validates, relationship
 
+from .types import BinaryUUID
+
 Base = declarative_base()
 
 class Tags(Base):
@@ -41,9 +43,10 @@ class Quotes(Base):
 
     __tablename__ = "quotes"
 
-    id = Column(String(36), primary_key=True)
+    # 16 bytes in the db, the canonical 36 character string in Python
+    id = Column(BinaryUUID, primary_key=True)
     text = Column(TEXT, nullable=False)
-    author = Column(String(100), ForeignKey('authors.author'))
+    author = Column(String(100), ForeignKey('authors.author'), index=True)
 
     authors = relationship("Authors", back_populates="quotes")
     quotes_tags_link = relationship("QuotesTagsLink", back_populates="quotes")
@@ -79,8 +82,9 @@ class QuotesTagsLink(Base):
 
     __tablename__ = "quotes_tags_link"
 
-    quote_id = Column(String(36), ForeignKey('quotes.id'), primary_key=True)
-    tag = Column(String(100), ForeignKey('tags.tag'), primary_key=True)
+    quote_id = Column(BinaryUUID, ForeignKey('quotes.id'), primary_key=True)
+    # the primary key (quote_id, tag) covers lookups by quote, the index lookups by tag
+    tag = Column(String(100), ForeignKey('tags.tag'), primary_key=True, index=True)
 
     quotes = relationship("Quotes", back_populates="quotes_tags_link")
     tags = relationship("Tags", back_populates="quotes_tags_link")
@@ -91,6 +95,18 @@ class QuotesTagsLink(Base):
         self.tag = tag
 
 
+class DataVersion(Base):
+    """
+    Single row counting the loads. The scraper bumps it after each load, the
+    query caches of other processes compare it (see database.queries).
+    """
+
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+
 class TestTable(Base):
     """
     SQLAlchemy ORM model for the TestTable.
@@ -0,0 +1,51 @@
+"""Custom column types.
+
+BinaryUUID stores the quote ids in 16 bytes instead of a 36 character
+string, which keeps the primary key, foreign key and index entries of the
+quotes and quotes_tags_link tables small. The Python side (ORM objects,
+query results, CSV/JSON exports) keeps the canonical string form.
+"""
+
+import uuid
+
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import LargeBinary, TypeDecorator, Uuid
+
+
+class BinaryUUID(TypeDecorator):
+    """
+    UUID stored as BINARY(16) on MySQL, as the native UUID type on backends
+    which have one (PostgreSQL) and as a 16 byte blob elsewhere (SQLite).
+
+    Binds canonical strings, uuid.UUID objects or 16 raw bytes, returns
+    canonical strings.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(mysql.BINARY(16))
+        if dialect.supports_native_uuid:
+            return dialect.type_descriptor(Uuid(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def _native(self, dialect):
+        return dialect.name != "mysql" and dialect.supports_native_uuid
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            value = uuid.UUID(bytes=bytes(value))
+        elif not isinstance(value, uuid.UUID):
+            value = uuid.UUID(value)
+        return str(value) if self._native(dialect) else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if self._native(dialect):
+            return str(value)
+        return str(uuid.UUID(bytes=bytes(value)))
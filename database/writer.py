@@ -0,0 +1,233 @@
+"""Write-behind database writer.
+
+BackgroundWriter moves the db writes of the scraper off the scraper threads.
+Producers put row batches into a bounded queue and return right away, one
+writer thread feeds them into a BulkWriter, which commits them once enough
+rows are queued or the flush interval has passed. When the queue is full,
+producers wait (backpressure), so memory stays bounded if the db is slower
+than the crawl.
+"""
+
+import queue
+import threading
+import time
+
+from configuration import get_configuration
+from squotes import logger
+
+from . import db_enable
+from .operations import get_bulk_writer
+
+configuration = get_configuration()
+
+# queued by close() to stop the writer thread
+_STOP = object()
+
+
+class _Barrier:
+    """
+    Queue item which is set once everything queued before it reached the
+    bulk writer, and was committed if `flush` is True.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.done = threading.Event()
+
+_db_writer = None
+_db_writer_lock = threading.Lock()
+
+
+class BackgroundWriter:
+    """
+    Bounded queue + writer thread in front of a BulkWriter. Has the same
+    add/add_all/update_pending/flush methods, so the scraper uses either.
+
+    An error of the writer thread is raised by the next call of a producer.
+    """
+
+    def __init__(self, bulk_writer, queue_size=1000, flush_interval=1.0):
+        """
+        Args:
+            bulk_writer (BulkWriter): Writer used by the writer thread. Its flush_rows is the size trigger,
+                the writer thread takes it over until close(), so every flush runs in the thread's error handling.
+            queue_size (int): Max number of queued batches before producers wait.
+            flush_interval (float): Max seconds rows stay queued in the bulk writer.
+        """
+        self.bulk_writer = bulk_writer
+        self.flush_rows = bulk_writer.flush_rows
+        bulk_writer.flush_rows = 0
+        self.flush_interval = flush_interval
+        self.chunk_size = bulk_writer.chunk_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._metrics_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+        # metrics
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            try:
+                if isinstance(item, _Barrier):
+                    if item.flush:
+                        self._flush()
+                        last_flush = time.monotonic()
+                    continue
+                # after a failure the rows are dropped, producers get the error
+                if item is not None and self._error is None:
+                    for row in item:
+                        self.bulk_writer.add(row)
+                if (
+                    time.monotonic() - last_flush >= self.flush_interval
+                    or (self.flush_rows and self.bulk_writer.pending() >= self.flush_rows)
+                ):
+                    self._flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                logger.error(f"db writer thread failed: {str(e)}")
+                self._error = self._error or e
+            finally:
+                # barriers are always released, also after a failure
+                if isinstance(item, _Barrier):
+                    item.done.set()
+                if item is not None:
+                    self._queue.task_done()
+
+    def _flush(self):
+        if self._error is not None:
+            return
+        try:
+            self.bulk_writer.flush()
+        except Exception as e:
+            logger.error(f"db writer thread failed: {str(e)}")
+            self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _check_thread(self):
+        # nothing releases producers waiting on a dead writer thread
+        if not self._thread.is_alive():
+            self._raise_error()
+            raise Exception("db writer thread stopped.")
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                self._check_thread()
+
+    def add_all(self, rows):
+        """
+        Queue a batch of ORM rows. Waits while the queue is full.
+        """
+        self._raise_error()
+        start = time.monotonic()
+        self._put(list(rows))
+        blocked = time.monotonic() - start
+        with self._metrics_lock:
+            self.blocked_seconds += blocked
+            self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def add(self, row):
+        self.add_all([row])
+
+    def flush(self):
+        """
+        Barrier: wait until every row queued so far is committed.
+
+        Raises:
+            Exception: The error of the writer thread, if a flush failed.
+        """
+        self._wait_for(_Barrier(flush=True))
+
+    def _wait_for(self, barrier):
+        self._put(barrier)
+        while not barrier.done.wait(0.1):
+            self._check_thread()
+        self._raise_error()
+
+    def update_pending(self, model, key_column, values):
+        """
+        Same as BulkWriter.update_pending, after the queued batches reached the bulk writer.
+        """
+        self._wait_for(_Barrier(flush=False))
+        return self.bulk_writer.update_pending(model, key_column, values)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Seconds producers waited for the full queue, max queue depth and the bulk writer counters.
+        """
+        return {
+            "blocked_seconds": self.blocked_seconds,
+            "max_queue_depth": self.max_queue_depth,
+            "rows_written": self.bulk_writer.rows_written,
+            "statements": self.bulk_writer.statements,
+            "flushes": self.bulk_writer.flushes,
+        }
+
+    def close(self):
+        """
+        Commit the queued rows and stop the writer thread.
+        """
+        try:
+            self.flush()
+            self._queue.put(_STOP)
+            self._thread.join()
+        finally:
+            # the bulk writer is shared (get_bulk_writer), it gets its size trigger back
+            self.bulk_writer.flush_rows = self.flush_rows
+
+
+def get_db_writer():
+    """
+    Get the writer used by the scraper.
+
+    Returns:
+        BackgroundWriter or BulkWriter: The shared background writer if
+            "db_write_behind" is 1, the shared bulk writer otherwise (or if the db is disabled).
+    """
+    global _db_writer
+    if db_enable == 0 or not configuration.get("db_write_behind", 0):
+        return get_bulk_writer()
+    if _db_writer is None:
+        with _db_writer_lock:
+            if _db_writer is None:
+                _db_writer = BackgroundWriter(
+                    get_bulk_writer(),
+                    queue_size=configuration.get("db_write_queue_size", 1000),
+                    flush_interval=configuration.get("db_write_flush_seconds", 1.0),
+                )
+                logger.info("Started background db writer.")
+    return _db_writer
+
+
+def close_db_writer():
+    """
+    Commit the rows queued in the background writer and stop its thread.
+    """
+    global _db_writer
+    with _db_writer_lock:
+        if _db_writer is not None:
+            _db_writer.close()
+            logger.info(f"Stopped background db writer: {_db_writer.metrics()}")
+            _db_writer = None
@@ -0,0 +1,273 @@
+"""HTML parser backends.
+
+All backends extract the same records from the quote pages and author pages:
+
+- "html.parser": BeautifulSoup with the pure-python html.parser.
+- "lxml": BeautifulSoup with the lxml tree builder.
+- "lxml-xpath": lxml.html with precompiled XPath expressions, no soup tree is built.
+
+The BeautifulSoup backends parse quote pages partially: only the div.quote
+and li.next elements are built into the tree and the fields are read with
+precompiled CSS selectors. If the result fails validation the page is parsed
+again in full.
+
+This module is what the parse processes import (see squotes.parse_pool), so
+it only imports the parsing libraries: no configuration, no log files and
+none of the squotes package.
+"""
+
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
+from loguru import logger
+from lxml import etree, html
+
+
+class SoupParser:
+    """
+    BeautifulSoup based parser.
+    """
+
+    # only these elements (and their descendants) are built by the partial parse
+    quote_page_strainer = SoupStrainer(class_=["quote", "next"])
+    quote_selector = sv.compile("div.quote")
+    quote_text_selector = sv.compile(".text")
+    author_selector = sv.compile(".author")
+    author_about_link_selector = sv.compile("span a[href]")
+    tags_selector = sv.compile("meta.keywords[content]")
+    next_page_selector = sv.compile("li.next a[href]")
+
+    def __init__(self, features, partial=True):
+        """
+        Args:
+            features (str): BeautifulSoup tree builder.
+            partial (bool): Try the partial parse of quote pages first.
+        """
+        self.name = features if partial else features + " (full)"
+        self.features = features
+        self.partial = partial
+
+    def soup(self, content, parse_only=None):
+        return BeautifulSoup(content, features=self.features, parse_only=parse_only)
+
+    def _main_div(self, quote_page):
+        return quote_page.find_all(class_="row")[1].find(class_="col-md-8")
+
+    def _next_page(self, main_div):
+        next_li = main_div.find("nav").find("li", class_="next")
+        return next_li.find("a")["href"] if next_li is not None else None
+
+    def parse_quote_page(self, content):
+        """
+        Parse a quotes page.
+
+        Args:
+            content (bytes): Raw html of the page.
+
+        Returns:
+            tuple: list of (quote_text, author, author_about_link, tags) tuples for each quote
+                   on the page, and the href of the next page (None on the last page).
+        """
+        if self.partial:
+            parsed = self.parse_quote_page_partial(content)
+            if parsed is not None:
+                return parsed
+            logger.info("partial parse of the quotes page failed validation, parsing the full page.")
+        return self.parse_quote_page_full(content)
+
+    def parse_quote_page_partial(self, content):
+        """
+        Parse only the div.quote and li.next elements of a quotes page.
+
+        Returns:
+            tuple or None: Same as parse_quote_page, None if a quote is missing a
+                           field or the page has no quotes.
+        """
+        quote_page = self.soup(content, parse_only=self.quote_page_strainer)
+
+        parsed_quotes = []
+        # the strained tree's top level elements are the matched div.quote and li.next elements
+        for div_quote_tag in quote_page.find_all(self.quote_selector.match, recursive=False):
+            quote_text = self.quote_text_selector.select_one(div_quote_tag)
+            author = self.author_selector.select_one(div_quote_tag)
+            author_about_link = self.author_about_link_selector.select_one(div_quote_tag)
+            tags = self.tags_selector.select_one(div_quote_tag)
+            if quote_text is None or author is None or author_about_link is None or tags is None:
+                return None
+
+            parsed_quotes.append(
+                (quote_text.get_text().strip(), author.get_text(), author_about_link["href"].strip(), tags["content"].split(","))
+            )
+
+        if not parsed_quotes:
+            return None
+
+        next_page = self.next_page_selector.select_one(quote_page)
+        return parsed_quotes, next_page["href"] if next_page is not None else None
+
+    def parse_quote_page_full(self, content):
+        main_div = self._main_div(self.soup(content))
+
+        div_quote_tags = main_div.find_all(class_="quote")
+
+        parsed_quotes = []
+        for div_quote_tag in div_quote_tags:
+            author_span_tag = div_quote_tag.find_all("span")[1] # less robust approach but i think it should be faster
+            author = author_span_tag.find(class_="author").get_text()
+            author_about_link = author_span_tag.find("a")["href"].strip()
+
+            quote_text = div_quote_tag.find(class_="text").get_text().strip()
+
+            div_quote_tag = div_quote_tag.find_all()
+            tags = div_quote_tag[5]["content"].split(",")
+
+            parsed_quotes.append((quote_text, author, author_about_link, tags))
+
+        return parsed_quotes, self._next_page(main_div)
+
+    def parse_pager(self, content):
+        """
+        Parse only what page count discovery needs.
+
+        Returns:
+            tuple: (has_quotes, next_page). has_quotes is False for pages past the
+                   last one, next_page is None on the last page.
+        """
+        try:
+            main_div = self._main_div(self.soup(content))
+        except IndexError:
+            return False, None
+        if main_div is None:
+            return False, None
+
+        has_quotes = main_div.find(class_="quote") is not None
+        try:
+            next_page = self._next_page(main_div)
+        except AttributeError:
+            next_page = None
+        return has_quotes, next_page
+
+    def parse_author_page(self, content):
+        """
+        Returns:
+            str: Text of the author-details element of an author's about page.
+        """
+        return self.soup(content).find(class_="author-details").get_text()
+
+    def has_expected_structure(self, content):
+        """
+        Returns:
+            bool: True if the second col-md-8 element of the page contains a quote.
+        """
+        return self.soup(content).find_all(class_="col-md-8")[1].find(class_="quote") is not None
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+def _soup_text(element):
+    # same text as BeautifulSoup's get_text(): bs4 collapses whitespace-only strings to "\n" or " "
+    strings = []
+    for string in element.itertext():
+        if not string.strip(ASCII_SPACES):
+            string = "\n" if "\n" in string else " "
+        strings.append(string)
+    return "".join(strings)
+
+
+class LxmlXpathParser:
+    """
+    lxml parser reading the fields with precompiled XPath expressions.
+    """
+
+    name = "lxml-xpath"
+
+    main_div = etree.XPath(f"((//*[{_has_class('row')}])[2]//*[{_has_class('col-md-8')}])[1]")
+    quotes = etree.XPath(f".//*[{_has_class('quote')}]")
+    quote_text = etree.XPath(f"(.//*[{_has_class('text')}])[1]")
+    author_span = etree.XPath("(.//span)[2]")
+    author = etree.XPath(f"(.//*[{_has_class('author')}])[1]")
+    author_about_link = etree.XPath("(.//a)[1]/@href")
+    tags = etree.XPath("(descendant::*)[6]/@content")
+    next_page = etree.XPath(f"((.//nav)[1]//li[{_has_class('next')}])[1]//a/@href")
+    has_quote = etree.XPath(f"boolean(.//*[{_has_class('quote')}])")
+    author_details = etree.XPath(f"(//*[{_has_class('author-details')}])[1]")
+    structure_check = etree.XPath(f"boolean((//*[{_has_class('col-md-8')}])[2]//*[{_has_class('quote')}])")
+
+    def tree(self, content):
+        return html.fromstring(content)
+
+    def _main_div(self, content):
+        main_div = self.main_div(self.tree(content))
+        if not main_div:
+            raise IndexError("quotes page doesn't have a main div.")
+        return main_div[0]
+
+    def _next_page(self, main_div):
+        next_page = self.next_page(main_div)
+        return next_page[0] if next_page else None
+
+    def parse_quote_page(self, content):
+        main_div = self._main_div(content)
+
+        parsed_quotes = []
+        for div_quote_tag in self.quotes(main_div):
+            author_span_tag = self.author_span(div_quote_tag)[0]
+            author = _soup_text(self.author(author_span_tag)[0])
+            author_about_link = self.author_about_link(author_span_tag)[0].strip()
+
+            quote_text = _soup_text(self.quote_text(div_quote_tag)[0]).strip()
+            tags = self.tags(div_quote_tag)[0].split(",")
+
+            parsed_quotes.append((quote_text, author, author_about_link, tags))
+
+        return parsed_quotes, self._next_page(main_div)
+
+    def parse_pager(self, content):
+        try:
+            main_div = self._main_div(content)
+        except (IndexError, etree.ParserError):
+            return False, None
+        return self.has_quote(main_div), self._next_page(main_div)
+
+    def parse_author_page(self, content):
+        return _soup_text(self.author_details(self.tree(content))[0])
+
+    def has_expected_structure(self, content):
+        return self.structure_check(self.tree(content))
+
+
+PARSERS = {
+    "html.parser": SoupParser("html.parser"),
+    "lxml": SoupParser("lxml"),
+    "lxml-xpath": LxmlXpathParser(),
+}
+
+# BeautifulSoup backends without the partial parse, for comparison in benchmarks
+FULL_PARSERS = {
+    "html.parser": SoupParser("html.parser", partial=False),
+    "lxml": SoupParser("lxml", partial=False),
+}
+
+
+def parse_quote_pages(contents, parser_name):
+    """
+    Parse a batch of quotes pages. Entry point of the parse processes.
+
+    Args:
+        contents (list): Raw html of the pages (bytes).
+        parser_name (str): Parser backend, see PARSERS.
+
+    Returns:
+        list: parse_quote_page results (parsed quotes, next page href) of each page.
+    """
+    parser = PARSERS[parser_name]
+    return [parser.parse_quote_page(content) for content in contents]
+
+
+def init_parse_worker():
+    # like squotes.utils, don't log to the terminal, it would break the progress bars
+    logger.remove()
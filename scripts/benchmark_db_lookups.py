@@ -0,0 +1,106 @@
+"""Benchmark tag and author lookups with and without the secondary indexes.
+
+Loads LINKS quote-tag links into a temporary SQLite file and times lookups
+of the quotes of a tag and of an author, first without the indexes on
+quotes_tags_link.tag and quotes.author (full scans), then with them.
+
+    python3 -m scripts.benchmark_db_lookups
+"""
+
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import select
+
+from database import create_db_engine
+from database.schema import Base, Authors, Quotes, QuotesTagsLink, Tags
+from squotes.utils import quote_id
+
+LINKS = 1_000_000
+TAGS_PER_QUOTE = 4
+TAGS = 2000
+AUTHORS = 10000
+LOOKUPS = 200
+CHUNK_SIZE = 10000
+
+
+def load(engine):
+    quotes_count = LINKS // TAGS_PER_QUOTE
+    tags = [f"tag-{i}" for i in range(TAGS)]
+    authors = [f"author {i}" for i in range(AUTHORS)]
+    rng = random.Random(0)
+
+    with engine.begin() as connection:
+        connection.execute(Authors.__table__.insert(), [{"author": author, "about": ""} for author in authors])
+        connection.execute(Tags.__table__.insert(), [{"tag": tag} for tag in tags])
+        for start in range(0, quotes_count, CHUNK_SIZE):
+            quotes = []
+            links = []
+            for i in range(start, min(start + CHUNK_SIZE, quotes_count)):
+                text = f"quote {i}"
+                author = authors[i % AUTHORS]
+                id = quote_id(text, author)
+                quotes.append({"id": id, "text": text, "author": author})
+                links.extend({"quote_id": id, "tag": tag} for tag in rng.sample(tags, TAGS_PER_QUOTE))
+            connection.execute(Quotes.__table__.insert(), quotes)
+            connection.execute(QuotesTagsLink.__table__.insert(), links)
+    return tags, authors
+
+
+def time_lookups(engine, tags, authors):
+    rng = random.Random(1)
+    results = {}
+    with engine.connect() as connection:
+        for name, column, result_column, values in [
+            ("quotes by tag", QuotesTagsLink.__table__.c.tag, QuotesTagsLink.__table__.c.quote_id, tags),
+            ("quotes by author", Quotes.__table__.c.author, Quotes.__table__.c.id, authors),
+        ]:
+            latencies = []
+            for value in rng.sample(values, LOOKUPS):
+                start = time.perf_counter()
+                connection.execute(select(result_column).where(column == value)).fetchall()
+                latencies.append(time.perf_counter() - start)
+            results[name] = latencies
+    return results
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmpdir, 'lookups.db')}")
+        indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+
+        Base.metadata.create_all(engine)
+        for index in indexes:
+            index.drop(engine)
+
+        start = time.perf_counter()
+        tags, authors = load(engine)
+        print(f"loaded {LINKS} links in {time.perf_counter() - start:.1f}s")
+
+        before = time_lookups(engine, tags, authors)
+
+        start = time.perf_counter()
+        for index in indexes:
+            index.create(engine)
+        print(f"created {[index.name for index in indexes]} in {time.perf_counter() - start:.1f}s")
+
+        after = time_lookups(engine, tags, authors)
+        engine.dispose()
+    finally:
+        shutil.rmtree(tmpdir)
+
+    print()
+    for name in before:
+        print(
+            f"{name:>18}: without indexes p50 {statistics.median(before[name]) * 1000:8.2f} ms, "
+            f"with indexes p50 {statistics.median(after[name]) * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
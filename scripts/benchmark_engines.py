@@ -0,0 +1,68 @@
+"""Benchmark the thread and asyncio crawl engines against a local stand-in site.
+
+Each engine runs once parsing in the fetching threads and once with the
+parse process pool (os.cpu_count() processes).
+
+Run with the db disabled, otherwise db latency dominates the numbers:
+
+    python3 -m scripts.benchmark_engines --db_enable 0
+"""
+
+import os
+import time
+
+from scripts import scraping_quotes
+from scripts.local_site import LocalSite
+from squotes import parse_pool
+
+PAGESNUM = 200
+LATENCY = 0.05  # seconds per request, simulates a remote server
+
+
+def run_engine(engine, site, parse_workers=0):
+    scraping_quotes.configuration["url"] = site.url
+    scraping_quotes.configuration["crawl_engine"] = engine
+    parse_pool.configuration["parse_workers"] = parse_workers
+    quotes_pages_urls = [site.url + "page/" + str(i + 1) for i in range(site.pagesnum)]
+
+    requests_before = site.requests_count
+    start = time.perf_counter()
+    quotes, quote_tag_link, tags, authors = scraping_quotes.scrape_quotes(quotes_pages_urls)
+    elapsed = time.perf_counter() - start
+    parse_pool.shutdown_parse_executor()
+
+    return {
+        "engine": engine + (f" + {parse_workers} parse processes" if parse_workers else ""),
+        "seconds": elapsed,
+        "requests": site.requests_count - requests_before,
+        "quotes": len(quotes),
+        "links": len(quote_tag_link),
+        "tags": len(tags),
+        "authors": len(authors),
+    }
+
+
+def main():
+    if scraping_quotes.configuration["db_enable"] != 0:
+        print("run the benchmark with --db_enable 0")
+        return
+
+    with LocalSite(pagesnum=PAGESNUM, latency=LATENCY) as site:
+        results = [
+            run_engine(engine, site, parse_workers)
+            for engine in ["threads", "asyncio"]
+            for parse_workers in [0, os.cpu_count() or 1]
+        ]
+
+    print()
+    for result in results:
+        print(
+            f"{result['engine']:>30}: {result['seconds']:.2f}s, "
+            f"{result['requests'] / result['seconds']:.1f} req/s "
+            f"(quotes={result['quotes']}, links={result['links']}, "
+            f"tags={result['tags']}, authors={result['authors']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
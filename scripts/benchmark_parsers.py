@@ -0,0 +1,101 @@
+"""Benchmark the html parser backends on a corpus of saved pages.
+
+The corpus is the bodies stored by the http cache (save_data_path/http_cache,
+run the scraper with --http_cache_enable 1 once to fill it). If the cache is
+empty, pages generated by the local stand-in site are used instead.
+
+    python3 -m scripts.benchmark_parsers
+"""
+
+import glob
+import os
+import time
+import tracemalloc
+
+from configuration import get_configuration
+from scripts.local_site import author_page_html, author_name, quote_page_html
+from squotes.parsers import FULL_PARSERS, PARSERS
+
+configuration = get_configuration()
+
+REPEAT = 3
+
+
+def load_corpus():
+    """
+    Returns:
+        tuple: (quote pages, author pages) as lists of bytes.
+    """
+    bodies_path = os.path.join(
+        configuration["save_data_path"], configuration.get("http_cache_dirname", "http_cache"), "bodies"
+    )
+    quote_pages = []
+    author_pages = []
+    for filename in glob.glob(os.path.join(bodies_path, "*")):
+        with open(filename, "rb") as f:
+            content = f.read()
+        if b"author-details" in content:
+            author_pages.append(content)
+        elif b'class="quote"' in content:
+            quote_pages.append(content)
+
+    if quote_pages:
+        print(f"corpus: {len(quote_pages)} quote pages, {len(author_pages)} author pages from {bodies_path}")
+        return quote_pages, author_pages
+
+    quote_pages = [quote_page_html(page, 100).encode("utf-8") for page in range(1, 101)]
+    author_pages = [author_page_html(author_name(i)).encode("utf-8") for i in range(50)]
+    print(f"corpus: {len(quote_pages)} generated quote pages, {len(author_pages)} generated author pages")
+    return quote_pages, author_pages
+
+
+def parse_corpus(parser, quote_pages, author_pages):
+    for content in quote_pages:
+        parser.parse_quote_page(content)
+    for content in author_pages:
+        parser.parse_author_page(content)
+
+
+def benchmark(parser, quote_pages, author_pages):
+    pages = len(quote_pages) + len(author_pages)
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        parse_corpus(parser, quote_pages, author_pages)
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc slows parsing down, so memory is measured in a separate pass
+    tracemalloc.start()
+    parse_corpus(parser, quote_pages, author_pages)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pages_per_sec": pages * REPEAT / elapsed,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main():
+    quote_pages, author_pages = load_corpus()
+
+    parsers = list(FULL_PARSERS.values()) + list(PARSERS.values())
+
+    # all backends must extract the same records
+    expected = [FULL_PARSERS["html.parser"].parse_quote_page(content) for content in quote_pages[:5]]
+    for parser in parsers:
+        if [parser.parse_quote_page(content) for content in quote_pages[:5]] != expected:
+            print(f"warning: {parser.name} output differs from html.parser (full)")
+
+    print()
+    for parser in parsers:
+        name = parser.name
+        result = benchmark(parser, quote_pages, author_pages)
+        print(
+            f"{name:>18}: {result['pages_per_sec']:8.1f} pages/s, "
+            f"peak allocated {result['peak_kib']:8.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
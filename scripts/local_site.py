@@ -0,0 +1,180 @@
+"""Local stand-in for quotes.toscrape.com.
+
+Serves generated pages with the same markup the scraper relies on, so the
+crawl engines can be benchmarked without hitting the real site. Each request
+can be delayed to simulate network latency.
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUOTES_PER_PAGE = 10
+
+HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>Quotes to Scrape</title></head>
+<body>
+    <div class="container">
+        <div class="row header-box">
+            <div class="col-md-8">
+                <h1><a href="/" style="text-decoration: none">Quotes to Scrape</a></h1>
+            </div>
+            <div class="col-md-4"><p><a href="/login">Login</a></p></div>
+        </div>
+"""
+
+FOOTER = """    </div>
+    <footer class="footer"><div class="container"><p class="text-muted">Quotes by: GoodReads.com</p></div></footer>
+</body>
+</html>
+"""
+
+QUOTE = """    <div class="quote" itemscope itemtype="http://schema.org/CreativeWork">
+        <span class="text" itemprop="text">“{text}”</span>
+        <span>by <small class="author" itemprop="author">{author}</small>
+        <a href="/author/{author_slug}">(about)</a>
+        </span>
+        <div class="tags">
+            Tags:
+            <meta class="keywords" itemprop="keywords" content="{keywords}" /    >
+            {tag_links}
+        </div>
+    </div>
+"""
+
+
+def author_name(i):
+    return f"Author {i}"
+
+
+def quote_page_html(page, pagesnum, authorsnum=50, tagsnum=138):
+    """
+    Generate the html of quotes page number `page`.
+
+    Pages after `pagesnum` contain no quotes, like on the real site.
+    """
+    quotes_html = ""
+    if page <= pagesnum:
+        for i in range(QUOTES_PER_PAGE):
+            n = (page - 1) * QUOTES_PER_PAGE + i
+            author = author_name(n % authorsnum)
+            tags = [f"tag-{(n + k) % tagsnum}" for k in range(n % 4 + 1)]
+            quotes_html += QUOTE.format(
+                text=f"Quote number {n}." + " Words of wisdom." * (n % 7 + 1),
+                author=author,
+                author_slug=author.replace(" ", "-"),
+                keywords=",".join(tags),
+                tag_links="\n            ".join(
+                    f'<a class="tag" href="/tag/{tag}/page/1/">{tag}</a>' for tag in tags
+                ),
+            )
+    else:
+        quotes_html = "No quotes found!\n"
+
+    pager = ""
+    if page > 1:
+        pager += f'<li class="previous"><a href="/page/{page - 1}/"><span aria-hidden="true">&larr;</span> Previous</a></li>\n'
+    if page < pagesnum:
+        pager += f'<li class="next"><a href="/page/{page + 1}/">Next <span aria-hidden="true">&rarr;</span></a></li>\n'
+
+    return (
+        HEADER
+        + '<div class="row">\n    <div class="col-md-8">\n'
+        + quotes_html
+        + f'    <nav>\n        <ul class="pager">\n{pager}        </ul>\n    </nav>\n'
+        + '    </div>\n    <div class="col-md-4 tags-box"><h2>Top Ten tags</h2></div>\n</div>\n'
+        + FOOTER
+    )
+
+
+def author_page_html(author):
+    return (
+        HEADER
+        + '<div class="author-details">\n'
+        + f'    <h3 class="author-title">{author}</h3>\n'
+        + '    <p><strong>Born:</strong> <span class="author-born-date">January 1, 1900</span></p>\n'
+        + f'    <div class="author-description">\n        {author} wrote a lot of quotes.\n    </div>\n'
+        + "</div>\n"
+        + FOOTER
+    )
+
+
+class LocalSite:
+    """
+    Threaded http server serving `pagesnum` generated quote pages.
+
+    Usage:
+        with LocalSite(pagesnum=100, latency=0.05) as site:
+            scrape(site.url)
+    """
+
+    def __init__(self, pagesnum=10, latency=0.0, port=0):
+        self.pagesnum = pagesnum
+        self.latency = latency
+        self.requests_count = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self._thread = None
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests_count += 1
+                if site.latency:
+                    time.sleep(site.latency)
+
+                parts = [part for part in self.path.split("/") if part]
+                if not parts:
+                    body = quote_page_html(1, site.pagesnum)
+                elif parts[0] == "page" and len(parts) > 1 and parts[1].isdigit():
+                    body = quote_page_html(int(parts[1]), site.pagesnum)
+                elif parts[0] == "author" and len(parts) > 1:
+                    body = author_page_html(parts[1].replace("-", " "))
+                else:
+                    self.send_error(404)
+                    return
+
+                body = body.encode("utf-8")
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
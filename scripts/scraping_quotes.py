@@ -1,16 +1,24 @@
+import asyncio
 import concurrent.futures
+import itertools
+import multiprocessing
 import threading
-import uuid
+from collections import deque
+from functools import partial
 
 import pandas as pd
 from bs4 import Tag
-from configuration import get_configuration
-from database import initDB, insertRow, Authors, Tags, Quotes, QuotesTagsLink, TestTable
-from database.operations import check_tables_exist, initialize_schema, updateAuthorRowAboutValue
+from configuration import get_configuration, save_configuration_values
+from database import get_pool_metrics, initDB, Authors, Tags, Quotes, QuotesTagsLink, TestTable
+from database.operations import bulk_update_authors_about, bump_data_version, check_tables_exist, get_load_mode, initialize_schema, load_tables, swap_shadow_tables, sync_tables
+from database.writer import close_db_writer, get_db_writer
 from squotes import BeautifulSoup as bs
-from squotes import fetchPage, logger, requests
+from squotes import close_page_archive, close_session, fetchPage, get_max_workers, get_parser, get_throttle_metrics, logger, requests
+from squotes.async_fetch import create_async_session, fetch_page_async, get_async_concurrency
+from squotes.archive import is_offline
+from squotes.parse_pool import get_parse_batch_size, get_parse_executor, shutdown_parse_executor, submit_parse
 from squotes.export_functions import exportMultipleDfsToOneJson, exportToCsv
-from squotes.utils import clean_numeric
+from squotes.utils import clean_numeric, quote_id
 from sqlalchemy.exc import SQLAlchemyError
 from tqdm import tqdm
 import json
@@ -43,10 +51,12 @@ import json
 # 1. append quotes lists to each other
 # 
 
-pbar_quotes = tqdm(total=100, desc="quotes")
-pbar_tags = tqdm(total=138, desc="tags")
-pbar_authors = tqdm(total=50, desc="authors")
-pbar_quote_tag_link = tqdm(total=235, desc="quotes_tags_links")
+# the parse processes import this module again as __mp_main__, only the main process shows the bars
+hide_pbars = multiprocessing.current_process().name != "MainProcess"
+pbar_quotes = tqdm(total=100, desc="quotes", disable=hide_pbars)
+pbar_tags = tqdm(total=138, desc="tags", disable=hide_pbars)
+pbar_authors = tqdm(total=50, desc="authors", disable=hide_pbars)
+pbar_quote_tag_link = tqdm(total=235, desc="quotes_tags_links", disable=hide_pbars)
 
 configuration = get_configuration()
 #print(type(configuration))
@@ -60,33 +70,89 @@ def update_pagesnum():
 
     addendant = 2
     next_page_url = url + "page/" + str(pagesnum + 1)
-    quote_page = bs(fetchPage(next_page_url).content, features="html.parser")
+    has_quotes, next_page = get_parser().parse_pager(fetchPage(next_page_url).content)
 
     while True:
-        try:
-            main_div = quote_page.find_all(class_="row")[1].find(class_="col-md-8")
-            next_page = main_div.find("nav").find("li", class_="next").find("a")["href"]
-
-        except AttributeError:
-            next_page = None
-
         if next_page != None:
             next_page_url = url + "page/" + str(pagesnum + addendant)
-            quote_page = bs(fetchPage(next_page_url).content, features="html.parser")
+            has_quotes, next_page = get_parser().parse_pager(fetchPage(next_page_url).content)
             addendant = addendant + 1
         else:
             #update configuration.json pagesnum value
-            with open("configuration.json", "r") as jsonFile:
-                data = json.load(jsonFile)
-                data["pagesnum"] = pagesnum + (addendant-1)
-                jsonFile.close()
-
-            with open("configuration.json", "w") as jsonFile:
-                json.dump(data, jsonFile)
-                jsonFile.close()
+            save_configuration_values({"pagesnum": pagesnum + (addendant-1)})
             break
 
 
+def probe_page(page: int):
+    """
+    Fetch quotes page number `page` and check where it is relative to the last page.
+
+    Returns:
+        tuple: (has_quotes, has_next). Pages after the last one have no quotes.
+    """
+    has_quotes, next_page = get_parser().parse_pager(fetchPage(configuration["url"] + "page/" + str(page)).content)
+    return has_quotes, next_page is not None
+
+
+def find_last_page(known_page: int, probe=probe_page, width=None):
+    """
+    Find the last quotes page with a galloping search.
+
+    Probes known_page + 1, + 2, + 4, ... until a page past the end is found,
+    then narrows the gap down, so n new pages cost O(log n) requests
+    instead of n. The first round probes only known_page + 1, so a run
+    without new pages costs one request. The number of exponents probed
+    concurrently doubles after every round which found only existing pages,
+    up to `width`.
+
+    Args:
+        known_page (int): A page which is known to have quotes.
+        probe (callable): page -> (has_quotes, has_next).
+        width (int, optional): Max probes per round. Defaults to the executor width.
+
+    Returns:
+        int: Number of the last page.
+    """
+    width = width or get_max_workers()
+    lo = known_page # highest page known to exist
+    hi = None # lowest page known to be past the end
+    exponent = 0
+    batch = 1 # exponents probed in the next galloping round
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=width) as executor:
+        while hi is None or hi - lo > 1:
+            if hi is None:
+                pages = [known_page + 2 ** (exponent + i) for i in range(batch)]
+                exponent += batch
+                batch = min(width, batch * 2)
+            else:
+                points = min(width, hi - lo - 1)
+                step = (hi - lo) / (points + 1)
+                pages = sorted({lo + max(1, round(step * (i + 1))) for i in range(points)})
+                pages = [page for page in pages if page < hi]
+
+            for page, (has_quotes, has_next) in zip(pages, executor.map(probe, pages)):
+                if has_quotes and not has_next:
+                    logger.info(f"last page found: {page}")
+                    return page
+                if has_quotes:
+                    lo = max(lo, page)
+                elif hi is None or page < hi:
+                    hi = page
+
+            logger.info(f"last page is between {lo} and {hi}")
+
+    return lo
+
+
+def discover_pagesnum():
+    """
+    Find the last quotes page with find_last_page and save it to configuration.json.
+    """
+    last_page = find_last_page(configuration["pagesnum"])
+    save_configuration_values({"pagesnum": last_page})
+
+
 def check_for_new_pages_and_update_pagesnum():
     """
     Checks if pagesnum + 1 from configuration.json exists. If they do, updates pagesnum in configuration.json
@@ -98,27 +164,31 @@ def check_for_new_pages_and_update_pagesnum():
     pagesnum = configuration["pagesnum"]
 
     next_page_url = url + "page/" + str(pagesnum)
-    quote_page = bs(fetchPage(next_page_url).content, features="html.parser")
-    try:
-        main_div = quote_page.find_all(class_="row")[1].find(class_="col-md-8")
-        next_page = main_div.find("nav").find("li", class_="next").find("a")["href"]
-
-    except AttributeError:
+    has_quotes, next_page = get_parser().parse_pager(fetchPage(next_page_url).content)
+    if next_page is None:
         return False
-    
+
     logger.info("more pages of quotes detected.")
-    update_pagesnum()
+    if configuration.get("pagesnum_discovery", "galloping") == "galloping":
+        discover_pagesnum()
+    else:
+        update_pagesnum()
     logger.info("updated pagesnum in configuration.")
     return True
 
 
-def quote_page_worker(page_url: str):
-    quote_page = bs(fetchPage(page_url).content, features="html.parser")
-    main_div = quote_page.find_all(class_="row")[1].find(class_="col-md-8")
+def store_quote_page(parsed_quotes, author_registry=None):
+    """
+    Queue the parsed quotes of a page for the db and collect them for the exports.
 
-    div_quote_tags = main_div.find_all(class_="quote")
+    Args:
+        parsed_quotes (list): Quotes returned by the parser's parse_quote_page.
+        author_registry (AuthorRegistry, optional): Gets every author as soon as
+            its row is inserted, so its about page can be fetched right away.
 
-    id = str(uuid.uuid4()) # for debugging
+    Returns:
+        dict: authors, all_tags, tags_relative_to_quotes and quotes of the page.
+    """
     # uuid, quote, author
     quotes = []
 
@@ -131,26 +201,13 @@ def quote_page_worker(page_url: str):
     # author : about link (to union all authors from workers afterwards (for authors table))
     authors = {}
 
-    for div_quote_tag in div_quote_tags:
-        
-
-        author_span_tag = div_quote_tag.find_all("span")[1] # less robust approach but i think it should be faster
-        author = author_span_tag.find(class_="author").get_text()
-        author_about_link = author_span_tag.find("a")["href"].strip()
-        ##print("author", author)
-        ##print("about_link" , author_about_link)
+    # rows of the page, handed to the db writer in one batch
+    rows = []
 
-        quote_uuid = str(uuid.uuid4()) 
-        quote_text = div_quote_tag.find(class_="text").get_text().strip()
+    for quote_text, author, author_about_link, tags in parsed_quotes:
+        quote_uuid = quote_id(quote_text, author)
         quote = {"quote_uuid": quote_uuid ,"quote_text": quote_text, "author": author}
         ##print("quote: ",id, quote)
-        
-
-        # an example of what i meant in whatsapp
-        div_quote_tag = div_quote_tag.find_all()
-        tags = div_quote_tag[5]["content"].split(",")
-        ##print("tags",id, tags)
-        ##print("\n\n")
 
         quotes.append(quote)
         authors[author] = author_about_link
@@ -158,57 +215,163 @@ def quote_page_worker(page_url: str):
         for tag in tags:
             all_tags.add(tag)
             tag_row = Tags(tag=tag)
-            insertRow(tag_row)
+            rows.append(tag_row)
         
-        author_row = Authors(author, author_about_link) #need to insert data into authors table before quotes because of FK. update about info later
-        insertRow(author_row)
+        author_row = Authors(author, author_about_link) # the bulk writer inserts authors before quotes because of FK. update about info later
+        rows.append(author_row)
+        if author_registry is not None:
+            author_registry.see(author, author_about_link)
 
         quote_row = Quotes(quote_uuid, quote_text, author)
-        insertRow(quote_row)
+        rows.append(quote_row)
         pbar_quotes.update(1)
 
         logger.info("scraped: quote: " + str(quote) + "; author: "+ author + "; tags: "+ str(tags))
 
+    queue_db_rows(rows)
 
-    ##print("end")
-    ##print("authors: ", authors)
-    ##print("all_tags: ", all_tags)
-    ##print("tags_relative_to_quotes: ", id, len(tags_relative_to_quotes))
-    ##print("quotes: ",id, len(quotes))
+    return {"authors": authors, "all_tags": all_tags, "tags_relative_to_quotes": tags_relative_to_quotes, "quotes": quotes}
 
-    
 
+def queue_db_rows(rows):
+    """
+    Hand rows to the db writer. In the "sync" and "infile" load modes nothing
+    is written during the crawl, sync_tables or load_tables write the rows afterwards.
+    """
+    if get_load_mode() not in ("sync", "infile"):
+        get_db_writer().add_all(rows)
 
-    #print("inserted for page ", page_url)
 
-    return {"authors": authors, "all_tags": all_tags, "tags_relative_to_quotes": tags_relative_to_quotes, "quotes": quotes}
+def parse_quote_page_content(content):
+    """
+    Parse a quotes page in the current thread, or in the parse process pool if "parse_workers" is set.
+
+    Returns:
+        tuple: The parser's parse_quote_page result.
+    """
+    if get_parse_executor() is None:
+        return get_parser().parse_quote_page(content)
+    return submit_parse([content]).result()[0]
+
+
+def store_parsed_quote_page(parsed_page, author_registry=None):
+    parsed_quotes, next_page = parsed_page
+    result = store_quote_page(parsed_quotes, author_registry)
+    result["next_page"] = next_page
+    return result
+
+
+def quote_page_worker(page_url: str, author_registry=None):
+    return store_parsed_quote_page(parse_quote_page_content(fetchPage(page_url).content), author_registry)
+
+
+def fetch_page_content(page_url: str):
+    return fetchPage(page_url).content
+
+
+def store_parsed_quote_pages(parse_future, author_registry=None):
+    return [store_parsed_quote_page(parsed_page, author_registry) for parsed_page in parse_future.result()]
+
+
+def author_about_url(author):
+    return configuration["url"] + author["about"].split("/", 1)[1]
+
+
+def store_author(author, about_text):
+    # the about texts are written to the db in bulk by store_authors_about after the crawl
+    logger.info(f"parsed {author["author"]}'s about page")
+    return {"author": author["author"], "about": about_text}
+
+
+def store_authors_about(authors):
+    """
+    Write the authors' about texts to the db.
+
+    Author rows which are still queued in the db writer are inserted with
+    their about text, the rest are updated with one set-based update. All
+    queued rows are committed before it returns.
+
+    Args:
+        authors (list): {"author", "about"} dicts returned by the scrape functions.
+
+    Returns:
+        dict or None: Counts returned by bulk_update_authors_about, None if the db is disabled.
+    """
+    about_texts = {author["author"]: author["about"] for author in authors}
+
+    db_writer = get_db_writer()
+    inserted_with_about = db_writer.update_pending(
+        Authors, "author", {author: {"about": about} for author, about in about_texts.items()}
+    )
+    db_writer.flush()
+    logger.info(f"{len(inserted_with_about)} authors were inserted with their about text.")
+
+    # rows flushed during the crawl still have the about link
+    return bulk_update_authors_about(about_texts, chunk_size=db_writer.chunk_size)
+
 
 # basically changes about from url to the description text of the author (done separately from quote worker to potentially save execution time)
 def authors_worker(author):
-    about_url = configuration["url"] + author["about"].split("/", 1)[1]
+    about_url = author_about_url(author)
     ##print("about_url", about_url)
-    about_page = bs(fetchPage(about_url).content, features="html.parser")
-    about_text = about_page.find(class_="author-details").get_text()
-    updateAuthorRowAboutValue(author["author"], about_text)
+    about_text = get_parser().parse_author_page(fetchPage(about_url).content)
+    return store_author(author, about_text)
 
-    logger.info(f"parsed {author["author"]}'s about page")
-    return {"author": author["author"], "about": about_text}
+
+class AuthorRegistry:
+    """
+    Thread-safe registry of the authors seen during a run.
+
+    The first time an author is seen its about page is scheduled with
+    `schedule`, which gets the author dict ({"author", "about"}) and returns a
+    concurrent.futures.Future of the authors_worker result. Later sightings
+    are ignored, so each about page is fetched once per run while the quote
+    pages are still being scraped.
+    """
+
+    def __init__(self, schedule):
+        self._schedule = schedule
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def see(self, author: str, about_link: str):
+        with self._lock:
+            if author not in self._futures:
+                self._futures[author] = self._schedule({"author": author, "about": about_link})
+
+    def results(self, authors_list):
+        """
+        Wait for the about pages.
+
+        Args:
+            authors_list (list): Author dicts in the order of the output.
+
+        Returns:
+            list: authors_worker results in the same order.
+        """
+        return [self._futures[author["author"]].result() for author in authors_list]
+
+    async def results_async(self, authors_list):
+        return await asyncio.gather(
+            *[asyncio.wrap_future(self._futures[author["author"]]) for author in authors_list]
+        )
 
 
 def check_structure_changes(response):
-    response_soup = bs(response.content, features="html.parser")
-    structure_check = response_soup.find_all(class_="col-md-8")[1].find(class_="quote")
-    # #print(structure_check)
-    if structure_check is None:
+    if not get_parser().has_expected_structure(response.content):
         raise Exception("Page structure has changed.")
     logger.info("page structure hasn't changed.")
 
-def scrape_quotes(quotes_pages_urls):
-            
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        quotes_map = executor.map(quote_page_worker, quotes_pages_urls)
+def merge_quote_page_results(quotes_map):
+    """
+    Merge the results of the quote page workers and queue the quote-tag links for the db.
 
+    Args:
+        quotes_map (iterable): store_quote_page results, in page order.
 
+    Returns:
+        tuple: quotes, quote_tag_link, tags and authors (author + about link dicts).
+    """
     quotes = []
     authors = {}
     tags = set()
@@ -217,6 +380,7 @@ def scrape_quotes(quotes_pages_urls):
 
     #quotes and tags_quote_link
     for result_dict in quotes_map:
+        quote_tag_link_rows = []
 
         quotes_tmp = result_dict["quotes"]
         tags_tmp = result_dict["tags_relative_to_quotes"]
@@ -226,10 +390,12 @@ def scrape_quotes(quotes_pages_urls):
                 quote_tag_link.append({"quote_uuid": quotes_tmp[i]["quote_uuid"], "tag": tags_tmp[i][j]})
                 quote_tag_link_row = QuotesTagsLink(quotes_tmp[i]["quote_uuid"], tags_tmp[i][j])
                 pbar_quote_tag_link.update(1)
-                insertRow(quote_tag_link_row)
+                quote_tag_link_rows.append(quote_tag_link_row)
 
             quotes.append(quotes_tmp[i])
 
+        queue_db_rows(quote_tag_link_rows)
+
         tags.update(result_dict["all_tags"])
         pbar_tags.reset()
         pbar_tags.update(len(tags))
@@ -245,45 +411,283 @@ def scrape_quotes(quotes_pages_urls):
     for author in authors:
         authors_list.append({"author":author, "about":authors[author]})
 
-    # authors
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        authors_map = executor.map(authors_worker, authors_list)
+    return quotes, quote_tag_link, tags, authors_list
+
+
+def scrape_quotes(quotes_pages_urls):
+    if configuration.get("crawl_engine", "threads") == "asyncio":
+        return scrape_quotes_async(quotes_pages_urls)
+
+    # authors' about pages are fetched while the quote pages are still being scraped
+    with concurrent.futures.ThreadPoolExecutor(max_workers=get_max_workers()) as authors_executor:
+        author_registry = AuthorRegistry(lambda author: authors_executor.submit(authors_worker, author))
 
-    authors = []
-    for author in authors_map:
-        authors.append(author)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+            if get_parse_executor() is None:
+                quotes_map = executor.map(partial(quote_page_worker, author_registry=author_registry), quotes_pages_urls)
+            else:
+                quotes_map = scrape_quote_pages_pipelined(executor, quotes_pages_urls, author_registry)
+
+        quotes, quote_tag_link, tags, authors_list = merge_quote_page_results(quotes_map)
+
+        # authors
+        authors = author_registry.results(authors_list)
 
     return quotes, quote_tag_link, tags, authors
 
+
+def scrape_quote_pages_pipelined(executor, quotes_pages_urls, author_registry):
+    """
+    Fetch the pages in the thread pool and parse them in batches in the parse process pool.
+
+    A batch is sent to the parse processes as soon as its pages are fetched,
+    so fetching and parsing overlap. The store tasks are queued behind the
+    fetch tasks and only wait for their batch's parse results.
+
+    Args:
+        executor (concurrent.futures.ThreadPoolExecutor): Fetch and store threads.
+        quotes_pages_urls (list): Quote page urls.
+        author_registry (AuthorRegistry): Passed to store_quote_page.
+
+    Returns:
+        list: store_quote_page results (with "next_page"), in page order.
+    """
+    contents = executor.map(fetch_page_content, quotes_pages_urls)
+
+    store_futures = []
+    for batch in itertools.batched(contents, get_parse_batch_size()):
+        store_futures.append(executor.submit(store_parsed_quote_pages, submit_parse(list(batch)), author_registry))
+
+    return [result for future in store_futures for result in future.result()]
+
+
+def quote_page_url(page: int):
+    return configuration["url"] + "page/" + str(page)
+
+
+def quote_page_url_from_href(href: str):
+    # "/page/2/" -> same format as quote_page_url(2)
+    return configuration["url"] + href.strip("/")
+
+
+class Frontier:
+    """
+    Queue of quote page urls for the frontier crawl.
+
+    The first `pagesnum_hint` pages are queued up front so the workers have
+    something to prefetch, every crawled page then queues the page its
+    li.next links to. Each url is queued once.
+    """
+
+    def __init__(self, pagesnum_hint: int):
+        self.queue = deque()
+        self.seen = set()
+        self.results = {}
+        self.first_page_url = quote_page_url(1)
+
+        for i in range(max(1, pagesnum_hint)):
+            self.push(quote_page_url(i + 1))
+
+    def push(self, page_url: str):
+        if page_url not in self.seen:
+            self.seen.add(page_url)
+            self.queue.append(page_url)
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def done(self, page_url: str, result: dict):
+        self.results[page_url] = result
+        if result["next_page"] is not None:
+            self.push(quote_page_url_from_href(result["next_page"]))
+
+    def ordered_results(self):
+        """
+        Returns:
+            list: Page results in site order (following the next links from page 1).
+                  Prefetched pages past the last page have no quotes and are left out.
+        """
+        ordered = []
+        page_url = self.first_page_url
+        while page_url in self.results and len(ordered) < len(self.results):
+            ordered.append(self.results[page_url])
+            next_page = self.results[page_url]["next_page"]
+            page_url = quote_page_url_from_href(next_page) if next_page is not None else None
+        return ordered
+
+
+def crawl_frontier(frontier: Frontier, author_registry: AuthorRegistry):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=get_max_workers()) as executor:
+        futures = {}
+        while True:
+            while frontier.queue:
+                page_url = frontier.pop()
+                futures[executor.submit(quote_page_worker, page_url, author_registry)] = page_url
+            if not futures:
+                break
+
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                frontier.done(futures.pop(future), future.result())
+
+
+def scrape_quotes_frontier(pagesnum_hint: int):
+    """
+    Crawl the quote pages by following the next links instead of a precomputed url list.
+
+    Discovery and scraping overlap: every finished page queues its next page
+    for the worker pool, so a stale pagesnum doesn't truncate the crawl. The
+    number of crawled pages is saved back to configuration.json as the hint
+    for the next run.
+
+    Args:
+        pagesnum_hint (int): Number of pages to queue up front.
+
+    Returns:
+        tuple: quotes, quote_tag_link, tags and authors, like scrape_quotes.
+    """
+    frontier = Frontier(pagesnum_hint)
+
+    if configuration.get("crawl_engine", "threads") == "asyncio":
+        results = asyncio.run(crawl_frontier_async(frontier))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=get_max_workers()) as authors_executor:
+            author_registry = AuthorRegistry(lambda author: authors_executor.submit(authors_worker, author))
+            crawl_frontier(frontier, author_registry)
+            quotes, quote_tag_link, tags, authors_list = merge_quote_page_results(frontier.ordered_results())
+            results = quotes, quote_tag_link, tags, author_registry.results(authors_list)
+
+    pagesnum = len(frontier.ordered_results())
+    logger.info(f"frontier crawl finished: {pagesnum} pages, {len(frontier.results)} fetched.")
+    if pagesnum != pagesnum_hint:
+        save_configuration_values({"pagesnum": pagesnum})
+
+    return results
+
+
+async def quote_page_worker_async(session, semaphore, page_url: str, author_registry=None):
+    content = await fetch_page_async(session, semaphore, page_url)
+    if get_parse_executor() is None:
+        parsed_page = get_parser().parse_quote_page(content)
+    else:
+        parsed_page = (await asyncio.wrap_future(submit_parse([content])))[0]
+    # db writes are blocking, keep them off the event loop
+    return await asyncio.to_thread(store_parsed_quote_page, parsed_page, author_registry)
+
+
+async def authors_worker_async(session, semaphore, author):
+    content = await fetch_page_async(session, semaphore, author_about_url(author))
+    return await asyncio.to_thread(store_author, author, get_parser().parse_author_page(content))
+
+
+def create_async_author_registry(session, semaphore):
+    # store_quote_page runs in a worker thread, so the about page coroutine is handed to the loop thread-safely
+    loop = asyncio.get_running_loop()
+    return AuthorRegistry(
+        lambda author: asyncio.run_coroutine_threadsafe(authors_worker_async(session, semaphore, author), loop)
+    )
+
+
+async def crawl_async(quotes_pages_urls):
+    semaphore = asyncio.Semaphore(get_async_concurrency())
+    async with create_async_session() as session:
+        author_registry = create_async_author_registry(session, semaphore)
+        quotes_map = await asyncio.gather(
+            *[quote_page_worker_async(session, semaphore, page_url, author_registry) for page_url in quotes_pages_urls]
+        )
+
+        quotes, quote_tag_link, tags, authors_list = merge_quote_page_results(quotes_map)
+
+        authors = await author_registry.results_async(authors_list)
+
+    return quotes, quote_tag_link, tags, list(authors)
+
+
+async def crawl_frontier_async(frontier: Frontier):
+    semaphore = asyncio.Semaphore(get_async_concurrency())
+    async with create_async_session() as session:
+        author_registry = create_async_author_registry(session, semaphore)
+        tasks = {}
+        while True:
+            while frontier.queue:
+                page_url = frontier.pop()
+                tasks[asyncio.create_task(quote_page_worker_async(session, semaphore, page_url, author_registry))] = page_url
+            if not tasks:
+                break
+
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                frontier.done(tasks.pop(task), task.result())
+
+        quotes, quote_tag_link, tags, authors_list = merge_quote_page_results(frontier.ordered_results())
+
+        authors = await author_registry.results_async(authors_list)
+
+    return quotes, quote_tag_link, tags, list(authors)
+
+
+def scrape_quotes_async(quotes_pages_urls):
+    """
+    Same as scrape_quotes, but all page and author page fetches run on one
+    asyncio event loop, bounded by the "async_concurrency" semaphore.
+    """
+    return asyncio.run(crawl_async(quotes_pages_urls))
+
+
 def main():
     global configuration
 
+    if is_offline():
+        logger.info("offline mode: pages are served from the page archive.")
+
     response = fetchPage(configuration["url"])
     if response is None:
         raise Exception("Failed to fetch the Quotes page")
 
     check_structure_changes(response)
-    
-    quotes_pages_urls = []
 
-    # 10 pages exist for sure.
-    # create a function which checks if 11th page exists. if true, iterate and change pages number in configuration.json
+    if configuration.get("crawl_mode", "pages") == "frontier":
+        # pages are discovered while crawling, pagesnum is only used to prefetch
+        initDB()
 
-    check_for_new_pages_and_update_pagesnum()
-    configuration = get_configuration()
+        quotes, quote_tag_link, tags, authors = scrape_quotes_frontier(configuration["pagesnum"])
+    else:
+        quotes_pages_urls = []
 
-    url = configuration["url"]
-    pagesnum = configuration["pagesnum"]
+        # 10 pages exist for sure.
+        # create a function which checks if 11th page exists. if true, iterate and change pages number in configuration.json
+
+        check_for_new_pages_and_update_pagesnum()
+        configuration = get_configuration()
+
+        url = configuration["url"]
+        pagesnum = configuration["pagesnum"]
 
-    for i in range(pagesnum):
-        next_page_url = url + "page/" + str(i+1)
-        quotes_pages_urls.append(next_page_url)
+        for i in range(pagesnum):
+            next_page_url = url + "page/" + str(i+1)
+            quotes_pages_urls.append(next_page_url)
 
-    ##print("len(quotes_pages)", len(quotes_pages_urls))
-    
-    initDB()
+        ##print("len(quotes_pages)", len(quotes_pages_urls))
 
-    quotes, quote_tag_link, tags, authors = scrape_quotes(quotes_pages_urls)
+        initDB()
+
+        quotes, quote_tag_link, tags, authors = scrape_quotes(quotes_pages_urls)
+
+    if get_load_mode() == "sync":
+        _, quote_ids = sync_tables(quotes, quote_tag_link, tags, authors, chunk_size=configuration.get("db_bulk_chunk_size", 1000))
+        # the exports use the ids the quotes are stored with, once they are committed
+        for row in quotes + quote_tag_link:
+            row["quote_uuid"] = quote_ids.get(row["quote_uuid"], row["quote_uuid"])
+    elif get_load_mode() == "infile":
+        load_tables(quotes, quote_tag_link, tags, authors, chunk_size=configuration.get("db_bulk_chunk_size", 1000))
+    else:
+        # barrier: the rows still queued in the db writer are committed, with the authors' about texts
+        store_authors_about(authors)
+        close_db_writer()
+        if get_load_mode() == "swap":
+            swap_shadow_tables()
+    # readers in other processes drop their cached query results
+    bump_data_version()
     # print(f"{len(quotes)}, {len(quote_tag_link)}, {len(tags)}, {len(authors)}")
 
     #print("quotes", len(quotes))
@@ -306,6 +710,17 @@ def main():
 
     exportMultipleDfsToOneJson(df_arr=df_arr, df_names_arr=df_names_arr)
 
+    throttle_metrics = get_throttle_metrics()
+    if throttle_metrics is not None:
+        logger.info(f"throttle metrics: {throttle_metrics}")
+    pool_metrics = get_pool_metrics()
+    if pool_metrics is not None:
+        logger.info(f"db pool metrics: {pool_metrics}")
+
+    close_session()
+    shutdown_parse_executor()
+    close_page_archive()
+
     # exportToJson(quotes_df, "quotes")
     # exportToJson(quote_tag_df, "quote_tag_link")
     # exportToJson(tags_df, "tags")
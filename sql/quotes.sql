@@ -4,23 +4,34 @@ CREATE TABLE authors (
 );
 
 CREATE TABLE quotes (
-    id UUID PRIMARY KEY,
+    id BINARY(16) PRIMARY KEY,
     text VARCHAR(255) NOT NULL,
     author VARCHAR(100),
     FOREIGN KEY (author) REFERENCES authors(author)
 );
 
+CREATE INDEX ix_quotes_author ON quotes (author);
+
 CREATE TABLE tags (
     tag VARCHAR(100) PRIMARY KEY
 );
 
 CREATE TABLE quotes_tags_link (
-    quote_id UUID,
+    quote_id BINARY(16),
     tag VARCHAR(100),
+    PRIMARY KEY (quote_id, tag),
     FOREIGN KEY (quote_id) REFERENCES quotes(id),
     FOREIGN KEY (tag) REFERENCES tags(tag)
 );
 
+CREATE INDEX ix_quotes_tags_link_tag ON quotes_tags_link (tag);
+
+-- bumped after each load, readers drop their cached query results when it changes
+CREATE TABLE data_version (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
 -- only insert changes when pages change
 CREATE TABLE pagesnum_changes (
     pagesnum INTEGER,
@@ -18,13 +18,24 @@ from bs4 import BeautifulSoup
 from .export_functions import exportToCsv, exportDfToJson, exportMultipleDfsToOneJson
 
 # Local imports
-from .utils import create_data_folder, logger, uuid_to_str
+from .utils import create_data_folder, logger, quote_id, uuid_to_str
+from .http_session import close_session, get_max_workers, get_session
+from .http_cache import cached_get, get_http_cache
+from .throttle import get_throttle_metrics
+from .parsers import get_parser
+from .archive import archive_page, archived_get, close_page_archive, is_offline
 
 
 def fetchPage(url):
     """
     Fetch a web page and return the response.
 
+    The request goes through the shared pooled session, so keep-alive
+    connections are reused between calls and threads. If the http cache is
+    enabled, unchanged pages are served from disk. Fetched pages are appended
+    to the page archive if it is enabled, in offline mode they are served
+    from the archive.
+
     Args:
         url (str): The URL of the page to fetch.
 
@@ -32,7 +43,8 @@ def fetchPage(url):
         requests.Response: The response object from the request.
 
     Raises:
-        Exception: If the page cannot be fetched due to network issues.
+        Exception: If the page cannot be fetched due to network issues, or
+            isn't in the archive in offline mode.
     """
     # headers = {
     #    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -44,9 +56,17 @@ def fetchPage(url):
     #    'Upgrade-Insecure-Requests': '1'
     # }
 
+    if is_offline():
+        return archived_get(url)
+
     try:
-        res = requests.get(url)
+        cache = get_http_cache()
+        if cache is not None:
+            res = cached_get(cache, get_session(), url)
+        else:
+            res = get_session().get(url)
         logger.info("Successfully fetched the page")
+        archive_page(url, res.status_code, res.headers, res.content)
         return res
     except requests.RequestException:
         logger.error("Failed to fetch the page - No internet connection.")
@@ -63,7 +83,15 @@ __all__ = [
     "exportDfToJson",
     "create_data_folder",
     "uuid_to_str",
+    "quote_id",
     "fetchPage",
+    "get_session",
+    "close_session",
+    "get_max_workers",
+    "get_http_cache",
+    "get_throttle_metrics",
+    "get_parser",
+    "close_page_archive",
     "logger",
     "exportMultipleDfsToOneJson"
 ]
@@ -0,0 +1,225 @@
+"""Raw page archive for the Squotes module.
+
+With "archive_enable", every fetched page (url, status, headers, body) is
+appended to an archive under save_data_path, so the pages can be parsed
+again after an extraction fix without crawling the site. With "offline",
+fetchPage and fetch_page_async serve the pages from the archive instead of
+the network.
+
+The archive is two append-only files: pages.dat holds the zlib compressed
+bodies back to back, pages.idx holds one json line per page with the offset
+and length of its body. Bodies are read from a memory map of pages.dat.
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from configuration import get_configuration
+
+from .utils import logger
+
+configuration = get_configuration()
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+class PageArchive:
+    """
+    Append-only compressed page archive. If a url is archived more than
+    once, the latest record is used. All methods are thread-safe.
+    """
+
+    def __init__(self, path, compression_level=6):
+        """
+        Args:
+            path (str): Directory of the archive.
+            compression_level (int): zlib compression level.
+        """
+        self.path = path
+        self.data_path = os.path.join(path, "pages.dat")
+        self.index_path = os.path.join(path, "pages.idx")
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._map = None
+
+        os.makedirs(path, exist_ok=True)
+        self._data = open(self.data_path, "ab")
+        self._index = open(self.index_path, "a", encoding="utf-8")
+        self._load_index()
+
+    def _load_index(self):
+        size = os.path.getsize(self.data_path)
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line of an interrupted run
+                    continue
+                if entry["offset"] + entry["length"] <= size:
+                    self._entries[entry["url"]] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def urls(self):
+        """
+        Returns:
+            list: Archived urls in the order they were first archived.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def append(self, url, status_code, headers, content):
+        """
+        Archive a fetched page.
+
+        Args:
+            url (str): The URL of the page.
+            status_code (int): Response status.
+            headers (Mapping): Response headers.
+            content (bytes): Response body.
+        """
+        compressed = zlib.compress(content, self.compression_level)
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(compressed)
+            # the body is on disk before the index line that points to it
+            self._data.flush()
+            entry = {
+                "url": url,
+                "status": status_code,
+                "headers": dict(headers),
+                "offset": offset,
+                "length": len(compressed),
+                "fetched_at": time.time(),
+            }
+            self._index.write(json.dumps(entry) + "\n")
+            self._index.flush()
+            self._entries[url] = entry
+
+    def lookup(self, url):
+        """
+        Returns:
+            dict or None: Index entry of the url, None if it isn't archived.
+        """
+        with self._lock:
+            return self._entries.get(url)
+
+    def read(self, entry):
+        """
+        Returns:
+            bytes: Decompressed body of an index entry.
+        """
+        end = entry["offset"] + entry["length"]
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                # map again to see records appended since the last map
+                if self._map is not None:
+                    self._map.close()
+                with open(self.data_path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            compressed = self._map[entry["offset"]:end]
+        return zlib.decompress(compressed)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._data.close()
+            self._index.close()
+
+
+def archived_response(url, entry, content):
+    """
+    Build a requests.Response for a page served from the archive.
+    """
+    res = requests.Response()
+    res.url = url
+    res.status_code = entry["status"]
+    res.reason = "OK"
+    res.headers = CaseInsensitiveDict(entry["headers"])
+    res._content = content
+    res.encoding = "utf-8"
+    return res
+
+
+def is_offline():
+    """
+    Returns:
+        bool: True if pages are served from the archive instead of the network.
+    """
+    return bool(configuration.get("offline", 0))
+
+
+def get_page_archive():
+    """
+    Get the shared page archive.
+
+    Returns:
+        PageArchive or None: The archive, None if both "archive_enable" and "offline" are 0.
+    """
+    global _archive
+    if not configuration.get("archive_enable", 0) and not is_offline():
+        return None
+    if _archive is None:
+        with _archive_lock:
+            if _archive is None:
+                _archive = PageArchive(
+                    path=configuration["save_data_path"] + "/" + configuration.get("archive_dirname", "archive"),
+                    compression_level=configuration.get("archive_compression_level", 6),
+                )
+                logger.info(f"Opened page archive in {_archive.path} ({len(_archive)} pages)")
+    return _archive
+
+
+def archived_get(url):
+    """
+    GET a url from the archive.
+
+    Args:
+        url (str): The URL of the page.
+
+    Returns:
+        requests.Response: Response built from the archived record.
+
+    Raises:
+        Exception: If the page isn't in the archive.
+    """
+    archive = get_page_archive()
+    entry = archive.lookup(url)
+    if entry is None:
+        logger.error(f"{url} is not in the page archive.")
+        raise Exception(f"{url} is not in the page archive.")
+    return archived_response(url, entry, archive.read(entry))
+
+
+def archive_page(url, status_code, headers, content):
+    """
+    Append a fetched page to the archive if "archive_enable" is set. Pages
+    served from the archive in offline mode aren't archived again.
+    """
+    if not configuration.get("archive_enable", 0) or is_offline():
+        return
+    get_page_archive().append(url, status_code, headers, content)
+
+
+def close_page_archive():
+    """
+    Close the shared page archive.
+    """
+    global _archive
+    with _archive_lock:
+        if _archive is not None:
+            _archive.close()
+            _archive = None
+            logger.info("Closed page archive.")
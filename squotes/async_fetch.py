@@ -0,0 +1,103 @@
+"""Asyncio page fetching for the Squotes module.
+
+This module provides the aiohttp session and fetch helper used by the asyncio
+crawl engine. All requests run on one event loop, the number of requests in
+flight is bounded by a semaphore instead of by the number of threads. The
+http cache and the page archive do blocking sqlite and file I/O, they run in
+worker threads (asyncio.to_thread) so they don't stall the event loop.
+"""
+
+import asyncio
+
+import aiohttp
+from configuration import get_configuration
+
+from .archive import archive_page, archived_get, is_offline
+from .http_cache import get_http_cache
+from .throttle import get_throttle
+from .utils import logger
+
+configuration = get_configuration()
+
+
+def get_async_concurrency():
+    """
+    Get the maximum number of requests in flight for the asyncio engine.
+
+    Returns:
+        int: "async_concurrency" from configuration (defaults to 200).
+    """
+    return configuration.get("async_concurrency", 200)
+
+
+def create_async_session():
+    """
+    Create an aiohttp session with a keep-alive connection pool.
+
+    The connector allows as many connections as the engine's concurrency,
+    "http_pool_maxsize" caps the connections per host (0 means no extra cap).
+
+    Returns:
+        aiohttp.ClientSession: The session. Use it as an async context manager.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=get_async_concurrency(),
+        limit_per_host=configuration.get("http_pool_maxsize", 0),
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def fetch_page_async(session, semaphore, url):
+    """
+    Fetch a web page and return its body.
+
+    Args:
+        session (aiohttp.ClientSession): The session to use.
+        semaphore (asyncio.Semaphore): Bounds the number of requests in flight.
+        url (str): The URL of the page to fetch.
+
+    Returns:
+        bytes: The body of the response.
+
+    Raises:
+        Exception: If the page cannot be fetched due to network issues, or
+            isn't in the archive in offline mode.
+    """
+    if is_offline():
+        return (await asyncio.to_thread(archived_get, url)).content
+
+    cache = get_http_cache()
+    entry = await asyncio.to_thread(cache.lookup, url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        logger.info(f"http cache hit: {url}")
+        content = await asyncio.to_thread(cache.read, entry)
+        await asyncio.to_thread(archive_page, url, 200, {}, content)
+        return content
+
+    throttle = get_throttle()
+    try:
+        headers = cache.conditional_headers(entry) if entry is not None else {}
+        async with semaphore:
+            start = await throttle.acquire_async(url) if throttle is not None else None
+            status = None
+            try:
+                async with session.get(url, headers=headers) as res:
+                    content = await res.read()
+                    status = res.status
+            finally:
+                if throttle is not None:
+                    throttle.release(start, status)
+        logger.info("Successfully fetched the page")
+        if cache is not None:
+            if res.status == 304 and entry is not None:
+                logger.info(f"http cache revalidated: {url}")
+                content = await asyncio.to_thread(cache.read, entry, revalidated=True)
+                await asyncio.to_thread(archive_page, url, 200, res.headers, content)
+                return content
+            if res.status == 200:
+                await asyncio.to_thread(cache.store, url, content, res.headers)
+        await asyncio.to_thread(archive_page, url, res.status, res.headers, content)
+        return content
+    except aiohttp.ClientError:
+        logger.error("Failed to fetch the page - No internet connection.")
+        raise Exception("Failed to fetch the page - No internet connection.")
@@ -3,6 +3,7 @@
 This module provides functions to export data to CSV and JSON formats.
 """
 
+import gzip
 import json
 
 import pandas as pd
@@ -51,17 +52,82 @@ def exportDfToJson(df, json_filename):
         json.dump(json_data, f, indent=2)
     logger.info(f"Data exported to {filename}")
 
-def exportMultipleDfsToOneJson(df_arr, df_names_arr, json_filename=json_filename):
-    filename = save_data_path + "/" + json_filename + ".json"
-    create_data_folder(filename)
+def iter_df_records(df):
+    """
+    Iterate over the rows of a DataFrame as dicts, one row at a time.
 
-    json_data = {}
+    Yields:
+        dict: The same record as df.to_dict(orient="records") has for the row.
+    """
+    columns = list(df.columns)
+    for row in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, row))
 
-    for i in range(len(df_arr)):
-        json_data[df_names_arr[i]] = df_arr[i].to_dict(orient="records")
-    # json_data = [{k: uuid_to_str(v) for k, v in record.items()} for record in json_data]
 
-    with open(filename, "w") as f:
-        json.dump(json_data, f, indent=2)
-    logger.info(f"Data exported to {filename}")
+def write_json_tables(file, tables, compact=False):
+    """
+    Write {name: [records]} JSON for several tables, one record at a time.
 
+    In pretty mode the output is byte-identical to json.dump(..., indent=2)
+    of the whole dict, compact mode writes no whitespace at all.
+
+    Args:
+        file (file object): Text file to write to.
+        tables (iterable): (name, records) pairs, records is an iterable of dicts.
+        compact (bool): Write without indentation.
+    """
+    if compact:
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        newline = ""
+        table_indent = record_indent = ""
+    else:
+        encode = json.JSONEncoder(indent=2).encode
+        newline = "\n"
+        table_indent = "  "
+        record_indent = "    "
+
+    file.write("{")
+    tables_written = 0
+    for name, records in tables:
+        file.write(("," if tables_written else "") + newline + table_indent + encode(str(name)) + (":" if compact else ": ") + "[")
+        records_written = 0
+        for record in records:
+            # records are nested two levels deep, their inner lines are indented to match
+            text = encode(record).replace("\n", "\n" + record_indent)
+            file.write(("," if records_written else "") + newline + record_indent + text)
+            records_written += 1
+        if records_written:
+            file.write(newline + table_indent)
+        file.write("]")
+        tables_written += 1
+    if tables_written:
+        file.write(newline)
+    file.write("}")
+
+
+def exportMultipleDfsToOneJson(df_arr, df_names_arr, json_filename=json_filename, compact=None, compress=None):
+    """
+    Export several DataFrames to one JSON file, {name: [records]}.
+
+    The records are streamed into the file row by row, the tables are never
+    held as Python dicts at once.
+
+    Args:
+        df_arr (list): The DataFrames to export.
+        df_names_arr (list): The names of the DataFrames in the JSON file.
+        json_filename (str, optional): The file name without extension.
+        compact (bool, optional): Write without indentation. Defaults to "json_compact" from configuration.
+        compress (bool, optional): Write a gzip compressed .json.gz file. Defaults to "json_gzip" from configuration.
+    """
+    if compact is None:
+        compact = bool(configuration.get("json_compact", 0))
+    if compress is None:
+        compress = bool(configuration.get("json_gzip", 0))
+
+    filename = save_data_path + "/" + json_filename + (".json.gz" if compress else ".json")
+    create_data_folder(filename)
+
+    tables = ((name, iter_df_records(df)) for name, df in zip(df_names_arr, df_arr))
+    with (gzip.open(filename, "wt") if compress else open(filename, "w")) as f:
+        write_json_tables(f, tables, compact=compact)
+    logger.info(f"Data exported to {filename}")
@@ -0,0 +1,239 @@
+"""On-disk http cache for the Squotes module.
+
+Responses are stored under save_data_path with their ETag, Last-Modified and
+content hash. Entries younger than the TTL are served from disk without a
+request, older ones are revalidated with a conditional GET and a 304 response
+is served from disk. The cache is evicted least recently used first once it
+grows over its size limit.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from configuration import get_configuration
+
+from .utils import logger
+
+configuration = get_configuration()
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+class HttpCache:
+    """
+    Persistent http cache. Bodies are stored once per content hash in
+    `bodies/`, the index (url -> validators, hash, timestamps) is a sqlite
+    database. All methods are thread-safe.
+    """
+
+    def __init__(self, path, max_bytes, ttl):
+        """
+        Args:
+            path (str): Directory of the cache.
+            max_bytes (int): Size limit of the stored bodies.
+            ttl (int): Seconds an entry is served without revalidation.
+        """
+        self.path = path
+        self.bodies_path = os.path.join(path, "bodies")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        os.makedirs(self.bodies_path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._db.commit()
+
+    def _body_path(self, content_hash):
+        return os.path.join(self.bodies_path, content_hash)
+
+    def lookup(self, url):
+        """
+        Returns:
+            dict or None: The index entry of the url, None if it isn't cached.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_hash, stored_at FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None or not os.path.exists(self._body_path(row[2])):
+            return None
+        return {"url": url, "etag": row[0], "last_modified": row[1], "content_hash": row[2], "stored_at": row[3]}
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.ttl
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, entry, revalidated=False):
+        """
+        Read the body of an entry and mark it as recently used.
+
+        Args:
+            entry (dict): Entry returned by lookup.
+            revalidated (bool): True if the server just answered 304, restarts the TTL.
+
+        Returns:
+            bytes: The cached body.
+        """
+        with open(self._body_path(entry["content_hash"]), "rb") as f:
+            content = f.read()
+
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute(
+                    "UPDATE entries SET stored_at = ?, last_access = ? WHERE url = ?", (now, now, entry["url"])
+                )
+            else:
+                self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, entry["url"]))
+            self._db.commit()
+        return content
+
+    def store(self, url, content, headers):
+        """
+        Store a 200 response body with its validators and evict old entries if needed.
+
+        Args:
+            url (str): The requested url.
+            content (bytes): The response body.
+            headers (Mapping): The response headers.
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(content_hash)
+        if not os.path.exists(body_path):
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, body_path)
+
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT content_hash FROM entries WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"), content_hash, len(content), now, now),
+            )
+            self._db.commit()
+            if old is not None and old[0] != content_hash:
+                self._delete_unreferenced_body(old[0])
+            self._evict()
+
+    def _delete_unreferenced_body(self, content_hash):
+        # bodies are shared between urls with identical content
+        referenced = self._db.execute(
+            "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if referenced is None:
+            try:
+                os.remove(self._body_path(content_hash))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for url, content_hash, size in self._db.execute(
+            "SELECT url, content_hash, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._delete_unreferenced_body(content_hash)
+            total -= size
+            evicted += 1
+        self._db.commit()
+        logger.info(f"http cache: evicted {evicted} entries, {total} bytes left.")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def cached_response(url, content, status_code=200):
+    """
+    Build a requests.Response for a body served from the cache.
+    """
+    res = requests.Response()
+    res.url = url
+    res.status_code = status_code
+    res.reason = "OK"
+    res._content = content
+    res.encoding = "utf-8"
+    return res
+
+
+def get_http_cache():
+    """
+    Get the shared http cache.
+
+    Returns:
+        HttpCache or None: The cache, None if "http_cache_enable" is 0.
+    """
+    global _http_cache
+    if not configuration.get("http_cache_enable", 0):
+        return None
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache(
+                    path=configuration["save_data_path"] + "/" + configuration.get("http_cache_dirname", "http_cache"),
+                    max_bytes=configuration.get("http_cache_max_mb", 100) * 1024 * 1024,
+                    ttl=configuration.get("http_cache_ttl_seconds", 0),
+                )
+                logger.info(f"Opened http cache in {_http_cache.path}")
+    return _http_cache
+
+
+def cached_get(cache, session, url):
+    """
+    GET a url through the http cache.
+
+    Args:
+        cache (HttpCache): The cache.
+        session (requests.Session): Session used for requests that reach the network.
+        url (str): The URL of the page to fetch.
+
+    Returns:
+        requests.Response: The network response, or a response built from the cache.
+    """
+    entry = cache.lookup(url)
+    if entry is not None and cache.is_fresh(entry):
+        logger.info(f"http cache hit: {url}")
+        return cached_response(url, cache.read(entry))
+
+    headers = cache.conditional_headers(entry) if entry is not None else {}
+    res = session.get(url, headers=headers)
+    if res.status_code == 304 and entry is not None:
+        logger.info(f"http cache revalidated: {url}")
+        return cached_response(url, cache.read(entry, revalidated=True))
+
+    if res.status_code == 200:
+        cache.store(url, res.content, res.headers)
+    return res
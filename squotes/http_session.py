@@ -0,0 +1,105 @@
+"""Pooled HTTP session for the Squotes module.
+
+This module keeps one shared requests.Session with a sized connection pool,
+so that the scraper threads reuse keep-alive connections instead of opening
+a new TCP+TLS connection for every page.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from configuration import get_configuration
+
+from .throttle import ThrottledHTTPAdapter, get_throttle
+from .utils import logger
+
+configuration = get_configuration()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_max_workers():
+    """
+    Get the number of worker threads used by the scraper executors.
+
+    Returns:
+        int: "max_workers" from configuration, or the ThreadPoolExecutor
+             default (min(32, cpu_count + 4)) if it is 0 or missing.
+    """
+    max_workers = configuration.get("max_workers", 0)
+    if not max_workers:
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+    return max_workers
+
+
+def create_session():
+    """
+    Create a requests.Session with a connection pool sized for the scraper.
+
+    "http_pool_maxsize" caps the number of kept-alive connections per host
+    (defaults to the executor width), "http_pool_connections" is the number
+    of hosts a pool is kept for and "http_pool_block" makes threads wait for
+    a free connection instead of opening extra ones above the cap. With
+    "throttle_enable", requests go through the adaptive throttle as well.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    pool_maxsize = configuration.get("http_pool_maxsize", 0) or get_max_workers()
+    pool_connections = configuration.get("http_pool_connections", 10)
+    pool_block = bool(configuration.get("http_pool_block", 1))
+
+    pool_kwargs = {
+        "pool_connections": pool_connections,
+        "pool_maxsize": pool_maxsize,
+        "pool_block": pool_block,
+    }
+    throttle = get_throttle()
+    if throttle is not None:
+        adapter = ThrottledHTTPAdapter(throttle, **pool_kwargs)
+    else:
+        adapter = HTTPAdapter(**pool_kwargs)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+
+    logger.info(
+        f"Created http session: pool_connections={pool_connections}, "
+        f"pool_maxsize={pool_maxsize}, pool_block={pool_block}"
+    )
+    return session
+
+
+def get_session():
+    """
+    Get the shared http session, creating it on first use.
+
+    The session is shared by all threads. urllib3's connection pools are
+    thread-safe, so the threads only compete for connections, not for the
+    session object itself.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """
+    Close the shared http session and release its pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            logger.info("Closed http session.")
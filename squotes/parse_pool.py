@@ -0,0 +1,100 @@
+"""Process pool parse stage for the Squotes module.
+
+Parsing html is CPU bound and holds the GIL, so with many fetch threads only
+one core does the parsing. With "parse_workers" set, the fetch threads (or
+the event loop) only download the raw pages and the pages are parsed in a
+shared ProcessPoolExecutor. The workers return the parser's plain tuples, so
+only bytes and small tuples cross the process boundary. The forkserver the
+workers are forked from preloads only html_parsers, which has no import
+side effects.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+
+import html_parsers
+from configuration import get_configuration
+
+from .parsers import get_parser
+from .utils import logger
+
+configuration = get_configuration()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_parse_workers():
+    """
+    Get the number of parse processes.
+
+    Returns:
+        int: "parse_workers" from configuration, os.cpu_count() if it is -1.
+             0 means the pages are parsed in the fetching thread.
+    """
+    parse_workers = configuration.get("parse_workers", 0)
+    if parse_workers < 0:
+        parse_workers = os.cpu_count() or 1
+    return parse_workers
+
+
+def get_parse_batch_size():
+    """
+    Returns:
+        int: Number of pages sent to a parse process at once ("parse_batch_size").
+    """
+    return max(1, configuration.get("parse_batch_size", 8))
+
+
+def get_parse_executor():
+    """
+    Get the shared parse process pool, creating it on first use.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor or None: The pool, None if
+            "parse_workers" is 0.
+    """
+    global _executor
+    parse_workers = get_parse_workers()
+    if not parse_workers:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # forking a process with running threads copies their locks and sockets,
+                # the workers are forked from a clean forkserver process instead
+                mp_context = multiprocessing.get_context("forkserver")
+                mp_context.set_forkserver_preload(["html_parsers"])
+                _executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=parse_workers, mp_context=mp_context, initializer=html_parsers.init_parse_worker
+                )
+                logger.info(f"Created parse process pool: parse_workers={parse_workers}")
+    return _executor
+
+
+def submit_parse(contents):
+    """
+    Parse a batch of quotes pages in the parse process pool.
+
+    Args:
+        contents (list): Raw html of the pages (bytes).
+
+    Returns:
+        concurrent.futures.Future: Future of the html_parsers.parse_quote_pages result.
+    """
+    parser_name = get_parser().name
+    return get_parse_executor().submit(html_parsers.parse_quote_pages, contents, parser_name)
+
+
+def shutdown_parse_executor():
+    """
+    Shut the shared parse process pool down.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+            logger.info("Shut down parse process pool.")
@@ -0,0 +1,30 @@
+"""HTML parser backends for the Squotes module.
+
+The backends ("html.parser", "lxml" and "lxml-xpath") live in html_parsers,
+which the parse processes import without the squotes package. The backend
+is selected with "html_parser" in configuration.json.
+"""
+
+from configuration import get_configuration
+from html_parsers import FULL_PARSERS, PARSERS, LxmlXpathParser, SoupParser, parse_quote_pages
+
+configuration = get_configuration()
+
+
+def get_parser(name=None):
+    """
+    Get a parser backend.
+
+    Args:
+        name (str, optional): Backend name. Defaults to "html_parser" from configuration.
+
+    Returns:
+        SoupParser or LxmlXpathParser: The backend.
+
+    Raises:
+        Exception: If there is no backend with that name.
+    """
+    name = name or configuration.get("html_parser", "html.parser")
+    if name not in PARSERS:
+        raise Exception(f"Unknown html parser '{name}'. Available parsers: {list(PARSERS)}")
+    return PARSERS[name]
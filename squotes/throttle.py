@@ -0,0 +1,289 @@
+"""Request throttling for the Squotes module.
+
+This module provides an AIMD concurrency controller and a per-host token
+bucket rate limiter. The concurrency limit grows by about one request per
+round trip while responses are fast and successful, and is halved on 429/5xx
+responses, errors or responses slower than the latency target.
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from configuration import get_configuration
+
+from .utils import logger
+
+configuration = get_configuration()
+
+_throttle = None
+_throttle_lock = threading.Lock()
+
+
+def _set_result(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` requests per second with bursts of `burst`.
+
+    reserve() never blocks, it takes a token (possibly going into debt) and
+    returns how long the caller has to wait, so the same bucket can be used
+    from threads (time.sleep) and from the event loop (asyncio.sleep).
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Returns:
+            float: Seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class Throttle:
+    """
+    AIMD concurrency limit plus one token bucket per host.
+
+    The limit only backs off once per latency window, so a burst of failures
+    from requests that were all in flight at the same time halves it once.
+    """
+
+    def __init__(self, initial, minimum, maximum, latency_target, rate_per_host=0, burst=1):
+        """
+        Args:
+            initial (int): Starting concurrency limit.
+            minimum (int): Lowest concurrency limit.
+            maximum (int): Highest concurrency limit.
+            latency_target (float): Responses slower than this (seconds) count as congestion.
+            rate_per_host (float): Requests per second per host, 0 means no rate limit.
+            burst (int): Token bucket size.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._last_backoff = 0.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        # (event loop, future) of the acquire_async calls waiting for a free slot
+        self._async_waiters = []
+
+        # metrics
+        self._started = time.monotonic()
+        self.requests = 0
+        self.congested = 0
+        self.total_latency = 0.0
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+            return self._buckets[host]
+
+    def rate_limit_delay(self, url):
+        """
+        Returns:
+            float: Seconds to wait for the host's token bucket (0 if there is no rate limit).
+        """
+        if not self.rate_per_host:
+            return 0.0
+        return self._bucket(url).reserve()
+
+    def acquire(self, url):
+        """
+        Block until the request to `url` may be sent.
+
+        Returns:
+            float: Start time, to be passed to release().
+        """
+        delay = self.rate_limit_delay(url)
+        if delay:
+            time.sleep(delay)
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def acquire_async(self, url):
+        """
+        Same as acquire, but waits on the event loop instead of blocking the thread.
+        """
+        delay = self.rate_limit_delay(url)
+        if delay:
+            await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return time.monotonic()
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                # resolved by release(), which may run in another thread
+                await waiter[1]
+            finally:
+                with self._lock:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def _wake_async_waiters(self):
+        # called with the lock held, like notify_all for the acquire_async waiters
+        for loop, future in self._async_waiters:
+            loop.call_soon_threadsafe(_set_result, future)
+        self._async_waiters.clear()
+
+    def release(self, start, status_code):
+        """
+        Record a finished request and adjust the concurrency limit.
+
+        Args:
+            start (float): Value returned by acquire().
+            status_code (int or None): Response status, None if the request failed.
+        """
+        now = time.monotonic()
+        latency = now - start
+        congested = status_code is None or status_code == 429 or status_code >= 500 or latency > self.latency_target
+
+        with self._condition:
+            self.in_flight -= 1
+            self.requests += 1
+            self.total_latency += latency
+            old_limit = int(self.limit)
+
+            if congested:
+                self.congested += 1
+                if now - self._last_backoff > latency:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_backoff = now
+            else:
+                # +1 per limit successful responses, i.e. about +1 per round trip
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+        if int(self.limit) != old_limit:
+            logger.info(f"throttle: concurrency limit {old_limit} -> {int(self.limit)} (status {status_code}, latency {latency:.3f}s)")
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Current concurrency limit, requests in flight, observed request
+                  rate, configured per host rate and request counters.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "rate": self.requests / elapsed if elapsed > 0 else 0.0,
+                "rate_limit_per_host": self.rate_per_host,
+                "requests": self.requests,
+                "congested": self.congested,
+                "avg_latency": self.total_latency / self.requests if self.requests else 0.0,
+            }
+
+
+class ThrottledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter which sends every request through a Throttle. Responses served
+    by the http cache never reach the adapter and aren't throttled.
+    """
+
+    def __init__(self, throttle, **kwargs):
+        self.throttle = throttle
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        start = self.throttle.acquire(request.url)
+        status_code = None
+        try:
+            res = super().send(request, **kwargs)
+            status_code = res.status_code
+            return res
+        finally:
+            self.throttle.release(start, status_code)
+
+
+def get_max_concurrency():
+    """
+    Get the upper concurrency limit of the throttle.
+
+    Returns:
+        int: "throttle_max_concurrency" from configuration, if it is 0 the
+             concurrency of the configured crawl engine (max_workers threads
+             or async_concurrency requests).
+    """
+    max_concurrency = configuration.get("throttle_max_concurrency", 0)
+    if max_concurrency:
+        return max_concurrency
+    # imported here, both modules import this one
+    if configuration.get("crawl_engine", "threads") == "asyncio":
+        from .async_fetch import get_async_concurrency
+
+        return get_async_concurrency()
+    from .http_session import get_max_workers
+
+    return get_max_workers()
+
+
+def get_throttle():
+    """
+    Get the shared throttle. The thread and the asyncio engine share it, so
+    its upper limit comes from configuration, see get_max_concurrency.
+
+    Returns:
+        Throttle or None: The throttle, None if "throttle_enable" is 0.
+    """
+    global _throttle
+    if not configuration.get("throttle_enable", 0):
+        return None
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = Throttle(
+                    initial=configuration.get("throttle_initial_concurrency", 4),
+                    minimum=configuration.get("throttle_min_concurrency", 1),
+                    maximum=get_max_concurrency(),
+                    latency_target=configuration.get("throttle_latency_target_ms", 2000) / 1000,
+                    rate_per_host=configuration.get("rate_limit_per_host", 0),
+                    burst=configuration.get("rate_limit_burst", 10),
+                )
+                logger.info(f"Created throttle: {_throttle.metrics()}")
+    return _throttle
+
+
+def get_throttle_metrics():
+    """
+    Returns:
+        dict or None: Metrics of the shared throttle, None if throttling is off.
+    """
+    if _throttle is None:
+        return None
+    return _throttle.metrics()
@@ -4,7 +4,10 @@ This module provides helper functions for file operations, UUID handling,
 and data cleaning.
 """
 
+import multiprocessing
 import os
+import re
+import unicodedata
 import uuid
 from datetime import timedelta
 from configuration import  get_configuration
@@ -23,11 +26,13 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 logs_path = os.path.join(project_root, configuration["logs_path"])
 os.makedirs(logs_path, exist_ok=True)
 log_file = os.path.join(logs_path, "logs_{time:DD-MM-YY_HH.mm.ss}.log")
-logger.add(
-    log_file,
-    format="{time} {level} {thread} {message}",
-    retention=timedelta(days=14),
-)  # write logs into a log file
+# child processes (the parse workers import the main module again) don't get a log file of their own
+if multiprocessing.current_process().name == "MainProcess":
+    logger.add(
+        log_file,
+        format="{time} {level} {thread} {message}",
+        retention=timedelta(days=14),
+    )  # write logs into a log file
 
 def create_data_folder(filename):
     """
@@ -65,6 +70,35 @@ def uuid_to_str(obj):
     return obj
 
 
+# namespace of the quote ids, derived once from the site url. Changing it changes every id.
+QUOTES_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://quotes.toscrape.com/")
+
+
+def normalize_text(text):
+    """
+    Normalize text for id generation: NFC unicode form, whitespace runs
+    collapsed to one space, leading and trailing whitespace removed.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def quote_id(quote_text, author):
+    """
+    Get the id of a quote.
+
+    The id is a UUIDv5 of the normalized author and text under
+    QUOTES_NAMESPACE, so a quote gets the same id in every run.
+
+    Args:
+        quote_text (str): Text of the quote.
+        author (str): Author of the quote.
+
+    Returns:
+        str: The id (36 characters).
+    """
+    return str(uuid.uuid5(QUOTES_NAMESPACE, normalize_text(author) + "\x1f" + normalize_text(quote_text)))
+
+
 def clean_numeric(value):
     """
     Clean and convert numeric strings to integers.